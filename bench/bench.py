@@ -0,0 +1,231 @@
+"""Scaling benchmarks for dataset generation and switch placement.
+
+Builds synthetic topologies and flow sets over a grid of sizes, times each
+phase and records its peak traced memory, and compares result files:
+
+    python bench/bench.py run --sizes 50x10000,200x100000 --out bench/results.json
+    python bench/bench.py compare bench/baseline.json bench/results.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "dataset"))
+sys.path.insert(0, str(REPO_ROOT / "phase-I"))
+
+import networkx as nx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from greedy.main import greedy_set_cover  # noqa: E402
+from ilp.highs import build_set_cover_highs, extract_highs_selection, solve_highs  # noqa: E402
+from ilp.ilp import SolverOptions, build_set_cover_model  # noqa: E402
+from src.compute_paths import compute_shortest_paths, write_paths  # noqa: E402
+from src.generate_flows import generate_flow_arrays  # noqa: E402
+from utils.data import load_paths  # noqa: E402
+from utils.eval import evaluate_cover  # noqa: E402
+from utils.reduce import reduce_flows  # noqa: E402
+
+PHASES = ["generate", "paths", "load", "load_cached", "reduce", "model_build", "greedy", "solve", "eval"]
+
+
+def synthetic_topology(n_nodes: int, seed: int) -> nx.Graph:
+    """Connected small-world graph with integer edge weights, labelled like TopologyZoo exports."""
+    graph = nx.connected_watts_strogatz_graph(n_nodes, k=4, p=0.2, seed=seed)
+    rng = np.random.RandomState(seed)
+    for u, v in graph.edges():
+        graph.edges[u, v]["weight"] = int(rng.randint(1, 10))
+    return nx.relabel_nodes(graph, lambda n: f"n{n}")
+
+
+def _pipeline(
+    n_nodes: int, n_flows: int, seed: int, work_dir: Path, options: SolverOptions
+) -> List[Tuple[str, Callable[[Dict[str, Any]], None]]]:
+    paths_file = work_dir / "paths.jsonl.gz"
+
+    def generate(state: Dict[str, Any]) -> None:
+        state["graph"] = synthetic_topology(n_nodes, seed)
+        state["flows"] = generate_flow_arrays(state["graph"], n_flows, rng=np.random.RandomState(seed))
+
+    def paths(state: Dict[str, Any]) -> None:
+        records = compute_shortest_paths(state["graph"], state["flows"].iter_flows(), weight_attr="weight")
+        write_paths(records, [paths_file])
+
+    def load(state: Dict[str, Any]) -> None:
+        state["dataset"] = load_paths(paths_file, cache="rebuild")
+
+    def load_cached(state: Dict[str, Any]) -> None:
+        state["dataset"] = load_paths(paths_file, cache="use")
+
+    def reduce(state: Dict[str, Any]) -> None:
+        state["instance"] = reduce_flows(state["dataset"]).dataset
+
+    def model_build(state: Dict[str, Any]) -> None:
+        build_set_cover_model(state["instance"])
+        state["model"] = build_set_cover_highs(state["instance"])
+
+    def greedy(state: Dict[str, Any]) -> None:
+        state["metrics"]["greedy_objective"] = len(greedy_set_cover(state["dataset"])[0])
+
+    def solve(state: Dict[str, Any]) -> None:
+        report = solve_highs(state["model"], options=options)
+        state["selected"] = extract_highs_selection(state["model"]) if report.objective is not None else []
+        state["metrics"].update(ilp_status=report.status, ilp_objective=report.objective, ilp_bound=report.bound)
+
+    def evaluate(state: Dict[str, Any]) -> None:
+        state["metrics"]["cover_ok"] = evaluate_cover(state["dataset"], state["selected"])[0]
+
+    steps = [generate, paths, load, load_cached, reduce, model_build, greedy, solve, evaluate]
+    return list(zip(PHASES, steps))
+
+
+def run_case(n_nodes: int, n_flows: int, seed: int, repeat: int, memory: bool, options: SolverOptions) -> Dict[str, Any]:
+    """Best-of-``repeat`` wall time per phase, plus one traced pass for peak memory."""
+    seconds: Dict[str, float] = {}
+    peaks: Dict[str, float] = {}
+    metrics: Dict[str, Any] = {}
+    passes = [False] * repeat + ([True] if memory else [])
+    for traced in passes:
+        with tempfile.TemporaryDirectory(prefix="bench_") as tmp:
+            state: Dict[str, Any] = {"metrics": metrics}
+            for name, step in _pipeline(n_nodes, n_flows, seed, Path(tmp), options):
+                if traced:
+                    tracemalloc.start()
+                    step(state)
+                    peaks[name] = tracemalloc.get_traced_memory()[1] / 2**20
+                    tracemalloc.stop()
+                else:
+                    start = time.perf_counter()
+                    step(state)
+                    elapsed = time.perf_counter() - start
+                    seconds[name] = min(seconds.get(name, elapsed), elapsed)
+            metrics.update(rows=state["instance"].n_flows, switches=state["dataset"].n_switches)
+
+    phases = {name: {"seconds": seconds.get(name), "peak_mb": peaks.get(name)} for name in PHASES}
+    return {"case": f"n{n_nodes}_f{n_flows}", "nodes": n_nodes, "flows": n_flows, "phases": phases, "metrics": metrics}
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _parse_sizes(text: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for item in text.split(","):
+        nodes, flows = item.lower().split("x")
+        sizes.append((int(nodes), int(flows)))
+    return sizes
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    options = SolverOptions(backend="highs", time_limit=args.time_limit, threads=args.threads)
+    results = []
+    for n_nodes, n_flows in _parse_sizes(args.sizes):
+        result = run_case(n_nodes, n_flows, args.seed, args.repeat, not args.no_memory, options)
+        results.append(result)
+        line = " ".join(f"{name}={p['seconds']:.3f}s" for name, p in result["phases"].items())
+        print(f"[bench] {result['case']}: {line}")
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "networkx": nx.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+    print(f"[done] {len(results)} cases | out={out_path}")
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, mem_threshold: float, min_seconds: float
+) -> List[str]:
+    """Human-readable regressions of ``current`` against ``baseline`` (empty when none)."""
+    base_cases = {r["case"]: r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = base_cases.get(result["case"])
+        if base is None:
+            continue
+        for name, phase in result["phases"].items():
+            old = base["phases"].get(name, {})
+            new_s, old_s = phase.get("seconds"), old.get("seconds")
+            if new_s is not None and old_s and new_s - old_s > min_seconds and new_s > old_s * (1 + threshold):
+                regressions.append(f"{result['case']} {name}: {old_s:.3f}s -> {new_s:.3f}s ({new_s / old_s:.2f}x)")
+            new_m, old_m = phase.get("peak_mb"), old.get("peak_mb")
+            if new_m is not None and old_m and new_m > old_m * (1 + mem_threshold) and new_m - old_m > 1.0:
+                regressions.append(f"{result['case']} {name}: peak {old_m:.1f}MB -> {new_m:.1f}MB")
+        for key in ("greedy_objective", "ilp_objective"):
+            old_v, new_v = base["metrics"].get(key), result["metrics"].get(key)
+            if old_v is not None and new_v is not None and new_v > old_v:
+                regressions.append(f"{result['case']} {key}: {old_v} -> {new_v}")
+        if result["metrics"].get("cover_ok") is False:
+            regressions.append(f"{result['case']}: solver cover failed evaluation")
+    return regressions
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    with open(args.baseline, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(args.current, "r", encoding="utf-8") as fh:
+        current = json.load(fh)
+    regressions = compare_results(baseline, current, args.threshold, args.mem_threshold, args.min_seconds)
+    for line in regressions:
+        print(f"[regression] {line}")
+    print(f"[done] {len(regressions)} regressions against {args.baseline}")
+    sys.exit(1 if regressions else 0)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scaling benchmarks for dataset generation and placement.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the size grid and write a results JSON.")
+    run.add_argument("--sizes", default="50x10000,100x50000,200x100000", help="Comma-separated NODESxFLOWS cases.")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--repeat", type=int, default=3, help="Timed passes per case (best time is kept).")
+    run.add_argument("--no-memory", action="store_true", help="Skip the traced pass that records peak memory.")
+    run.add_argument("--time-limit", type=float, default=60.0, help="HiGHS time limit per solve.")
+    run.add_argument("--threads", type=int, help="HiGHS threads.")
+    run.add_argument("--out", default="bench/results.json")
+    run.set_defaults(func=cmd_run)
+
+    compare = sub.add_parser("compare", help="Flag regressions of a results file against a baseline.")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown that counts as a regression.")
+    compare.add_argument("--mem-threshold", type=float, default=0.2, help="Relative peak-memory growth to flag.")
+    compare.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this.")
+    compare.set_defaults(func=cmd_compare)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,71 @@
 import gzip
 import json
 import logging
-from typing import Dict, Iterable, List, Optional, Sequence
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import networkx as nx
+import numpy as np
 
 
 PathRecord = Dict[str, object]
+# (path node names, hop count, cost) per (src, dst); None marks an unreachable pair.
+PairPath = Optional[Tuple[List[str], int, float]]
+PathCache = Dict[Tuple[object, object], PairPath]
+
+
+def _resolve_pair(graph: nx.Graph, src, dst, weight_attr: Optional[str]) -> PairPath:
+    try:
+        path_nodes = nx.shortest_path(graph, source=src, target=dst, weight=weight_attr)
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        return None
+
+    total_weight = 0.0
+    if weight_attr:
+        # Sum edge weights if present; fallback to hop count otherwise.
+        for u, v in zip(path_nodes[:-1], path_nodes[1:]):
+            edge_data = graph.get_edge_data(u, v, default={})
+            total_weight += float(edge_data.get(weight_attr, 1.0))
+    else:
+        total_weight = float(len(path_nodes) - 1)
+    return [str(node) for node in path_nodes], len(path_nodes) - 1, total_weight
 
 
 def compute_shortest_paths(
-    graph: nx.Graph, flows: Sequence[Dict[str, object]], weight_attr: Optional[str] = None
+    graph: nx.Graph,
+    flows: Iterable[Dict[str, object]],
+    weight_attr: Optional[str] = None,
+    cache: Optional[PathCache] = None,
 ) -> List[PathRecord]:
+    """Resolve one shortest path per flow, computing each (src, dst) pair only once.
+
+    Pass the same ``cache`` dict across calls to reuse paths between flow batches.
+    """
+    if cache is None:
+        cache = {}
     paths: List[PathRecord] = []
     skipped = 0
 
     for flow in flows:
         src = flow["src"]
         dst = flow["dst"]
-        try:
-            path_nodes = nx.shortest_path(graph, source=src, target=dst, weight=weight_attr)
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
+        key = (src, dst)
+        if key in cache:
+            resolved = cache[key]
+        else:
+            resolved = cache[key] = _resolve_pair(graph, src, dst, weight_attr)
+        if resolved is None:
             skipped += 1
             continue
 
-        total_weight = 0.0
-        if weight_attr:
-            # Sum edge weights if present; fallback to hop count otherwise.
-            for u, v in zip(path_nodes[:-1], path_nodes[1:]):
-                edge_data = graph.get_edge_data(u, v, default={})
-                total_weight += float(edge_data.get(weight_attr, 1.0))
-        else:
-            total_weight = float(len(path_nodes) - 1)
-
+        path_nodes, hops, total_weight = resolved
         paths.append(
             {
                 "id": flow["id"],
                 "src": str(src),
                 "dst": str(dst),
-                "path": [str(node) for node in path_nodes],
-                "hops": len(path_nodes) - 1,
+                "path": path_nodes,
+                "hops": hops,
                 "cost": total_weight,
             }
         )
@@ -49,9 +75,92 @@ def compute_shortest_paths(
     return paths
 
 
-def write_paths_jsonl_gz(paths: Iterable[PathRecord], path) -> None:
-    out_path = str(path)
-    with gzip.open(out_path, "wt", encoding="utf-8") as fh:
+class JsonlGzPathWriter:
+    def __init__(self, path) -> None:
+        self._fh = gzip.open(str(path), "wt", encoding="utf-8")
+
+    def write(self, record: PathRecord) -> None:
+        self._fh.write(json.dumps(record))
+        self._fh.write("\n")
+
+    def close(self) -> None:
+        self._fh.close()
+
+
+class NpzPathWriter:
+    """Columnar path store: a switch-name table plus CSR arrays, saved uncompressed.
+
+    Arrays: ``switch_names`` (interned in first-appearance order, matching the
+    JSONL loader), ``indptr``/``indices`` (per-flow switch ids), ``hops``,
+    ``cost`` and ``flow_ids``. Members are stored uncompressed so readers can
+    memory-map them straight out of the archive.
+    """
+
+    def __init__(self, path) -> None:
+        self._path = str(path)
+        self._name_to_sid: Dict[str, int] = {}
+        self._switch_names: List[str] = []
+        self._indptr = array("q", [0])
+        self._indices = array("i")
+        self._hops = array("i")
+        self._cost = array("d")
+        self._flow_ids: List[object] = []
+
+    def write(self, record: PathRecord) -> None:
+        name_to_sid = self._name_to_sid
+        for node in record["path"]:
+            sid = name_to_sid.get(node)
+            if sid is None:
+                sid = name_to_sid[node] = len(self._switch_names)
+                self._switch_names.append(node)
+            self._indices.append(sid)
+        self._indptr.append(len(self._indices))
+        self._hops.append(int(record["hops"]))
+        self._cost.append(float(record["cost"]))
+        self._flow_ids.append(record["id"])
+
+    def close(self) -> None:
+        if all(isinstance(fid, (int, np.integer)) for fid in self._flow_ids):
+            flow_ids = np.array(self._flow_ids, dtype=np.int64)
+        else:
+            flow_ids = np.array([str(fid) for fid in self._flow_ids])
+        with open(self._path, "wb") as fh:
+            np.savez(
+                fh,
+                switch_names=np.array(self._switch_names, dtype=str),
+                indptr=np.frombuffer(self._indptr, dtype=np.int64),
+                indices=np.frombuffer(self._indices, dtype=np.int32),
+                hops=np.frombuffer(self._hops, dtype=np.int32),
+                cost=np.frombuffer(self._cost, dtype=np.float64),
+                flow_ids=flow_ids,
+            )
+
+
+def open_path_writer(path):
+    """Pick the path output format from the file extension (.npz or JSONL gzip)."""
+    if str(path).endswith(".npz"):
+        return NpzPathWriter(path)
+    return JsonlGzPathWriter(path)
+
+
+def write_paths(paths: Iterable[PathRecord], out_paths: Sequence) -> None:
+    """Consume ``paths`` once, writing every record to each output file."""
+    writers = [open_path_writer(path) for path in out_paths]
+    try:
         for record in paths:
-            fh.write(json.dumps(record))
-            fh.write("\n")
+            for writer in writers:
+                writer.write(record)
+    finally:
+        for writer in writers:
+            writer.close()
+
+
+def iter_paths_jsonl_gz(path) -> Iterable[PathRecord]:
+    with gzip.open(str(path), "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def write_paths_jsonl_gz(paths: Iterable[PathRecord], path) -> None:
+    write_paths(paths, [path])
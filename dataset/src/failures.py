@@ -0,0 +1,258 @@
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+if __package__ is None or __package__ == "":
+    repo_root = Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(repo_root))
+
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from src.compute_paths import PairPath, PathRecord, _resolve_pair, iter_paths_jsonl_gz, write_paths
+from src.load_topology import load_topology
+from src.utils import ensure_out_dir, load_config, setup_logging, write_json
+
+Pair = Tuple[str, str]
+Edge = Tuple[str, str]
+
+
+@dataclass
+class Scenario:
+    name: str
+    edges: List[Edge] = field(default_factory=list)
+    nodes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class PathIndex:
+    """Cached paths grouped by (src, dst) pair, with the pairs routed over each edge and node.
+
+    Paths are computed once per pair, so every flow of a pair shares one
+    ``(path, hops, cost)``; ``flows`` keeps the flow ids in file order.
+    """
+
+    directed: bool
+    paths: Dict[Pair, PairPath] = field(default_factory=dict)
+    flows: Dict[Pair, List[object]] = field(default_factory=dict)
+    edge_pairs: Dict[Edge, List[Pair]] = field(default_factory=dict)
+    node_pairs: Dict[str, List[Pair]] = field(default_factory=dict)
+
+    def edge_key(self, u: str, v: str) -> Edge:
+        return (u, v) if self.directed or u <= v else (v, u)
+
+    def add(self, record: PathRecord) -> None:
+        pair = (str(record["src"]), str(record["dst"]))
+        if pair not in self.paths:
+            path_nodes = [str(node) for node in record["path"]]
+            self.paths[pair] = (path_nodes, int(record["hops"]), float(record["cost"]))
+            self.flows[pair] = []
+            for node in set(path_nodes):
+                self.node_pairs.setdefault(node, []).append(pair)
+            for edge in {self.edge_key(u, v) for u, v in zip(path_nodes[:-1], path_nodes[1:])}:
+                self.edge_pairs.setdefault(edge, []).append(pair)
+        self.flows[pair].append(record["id"])
+
+    def affected_pairs(self, scenario: Scenario) -> Set[Pair]:
+        """Pairs whose cached path traverses a failed edge or node."""
+        affected: Set[Pair] = set()
+        for u, v in scenario.edges:
+            affected.update(self.edge_pairs.get(self.edge_key(u, v), ()))
+        for node in scenario.nodes:
+            affected.update(self.node_pairs.get(node, ()))
+        return affected
+
+
+def build_path_index(records: Iterable[PathRecord], directed: bool) -> PathIndex:
+    index = PathIndex(directed=directed)
+    for record in records:
+        index.add(record)
+    return index
+
+
+def reroute(
+    graph: nx.Graph, index: PathIndex, scenario: Scenario, weight_attr: Optional[str] = None
+) -> Dict[Pair, PairPath]:
+    """New paths (``None`` when disconnected) for the pairs a scenario affects.
+
+    Removing edges or nodes never shortens a path, so every other pair's cached
+    path is still a shortest path of the failed topology and is kept as is.
+    """
+    view = nx.restricted_view(graph, scenario.nodes, scenario.edges)
+    return {
+        pair: _resolve_pair(view, pair[0], pair[1], weight_attr)
+        for pair in sorted(index.affected_pairs(scenario))
+    }
+
+
+def _path_record(flow_id: object, pair: Pair, resolved: PairPath, **extra: Any) -> PathRecord:
+    path_nodes, hops, cost = resolved
+    return {"id": flow_id, "src": pair[0], "dst": pair[1], "path": path_nodes, "hops": hops, "cost": cost, **extra}
+
+
+def iter_delta_records(index: PathIndex, rerouted: Dict[Pair, PairPath]) -> Iterable[PathRecord]:
+    """Delta records for phase-I: each affected flow's old path with ``op: remove``, then its new one with ``op: add``.
+
+    Flows of pairs the failure disconnects only get the remove record.
+    """
+    for pair in rerouted:
+        for flow_id in index.flows[pair]:
+            yield _path_record(flow_id, pair, index.paths[pair], op="remove")
+    for pair, resolved in rerouted.items():
+        if resolved is not None:
+            for flow_id in index.flows[pair]:
+                yield _path_record(flow_id, pair, resolved, op="add")
+
+
+def iter_scenario_paths(base_paths: Path, rerouted: Dict[Pair, PairPath]) -> Iterable[PathRecord]:
+    """The base path file with affected flows rerouted and disconnected flows dropped."""
+    for record in iter_paths_jsonl_gz(base_paths):
+        pair = (str(record["src"]), str(record["dst"]))
+        if pair not in rerouted:
+            yield record
+        elif rerouted[pair] is not None:
+            yield _path_record(record["id"], pair, rerouted[pair])
+
+
+# Shared by the scenario workers; set once per process by _init_worker.
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(graph: nx.Graph, index: PathIndex, weight_attr: Optional[str], base_paths: Path) -> None:
+    _WORKER.update(graph=graph, index=index, weight_attr=weight_attr, base_paths=base_paths)
+
+
+def _run_scenario(task: Dict[str, Any]) -> Dict[str, Any]:
+    scenario: Scenario = task["scenario"]
+    index: PathIndex = _WORKER["index"]
+    start = time.perf_counter()
+    rerouted = reroute(_WORKER["graph"], index, scenario, _WORKER["weight_attr"])
+    if task["output"] == "delta":
+        write_paths(iter_delta_records(index, rerouted), [task["out_path"]])
+    else:
+        write_paths(iter_scenario_paths(_WORKER["base_paths"], rerouted), [task["out_path"]])
+
+    affected_flows = sum(len(index.flows[pair]) for pair in rerouted)
+    disconnected = [pair for pair, resolved in rerouted.items() if resolved is None]
+    return {
+        "name": scenario.name,
+        "failed_edges": [list(edge) for edge in scenario.edges],
+        "failed_nodes": scenario.nodes,
+        "affected_pairs": len(rerouted),
+        "affected_flows": affected_flows,
+        "disconnected_pairs": len(disconnected),
+        "disconnected_flows": sum(len(index.flows[pair]) for pair in disconnected),
+        "seconds": time.perf_counter() - start,
+        "output": str(task["out_path"]),
+    }
+
+
+def load_scenarios(args: argparse.Namespace, graph: nx.Graph) -> List[Scenario]:
+    scenarios: List[Scenario] = []
+    if args.scenarios:
+        for idx, spec in enumerate(load_config(Path(args.scenarios)) or []):
+            edges = [(str(u), str(v)) for u, v in spec.get("edges") or []]
+            nodes = [str(node) for node in spec.get("nodes") or []]
+            scenarios.append(Scenario(str(spec.get("name") or f"scenario_{idx:04d}"), edges, nodes))
+    if args.fail_edge or args.fail_node:
+        edges = [(str(u), str(v)) for u, v in args.fail_edge or []]
+        scenarios.append(Scenario("custom", edges, [str(node) for node in args.fail_node or []]))
+    if args.single_links:
+        scenarios.extend(Scenario(f"link_{u}-{v}", [(str(u), str(v))]) for u, v in graph.edges())
+    if args.single_nodes:
+        scenarios.extend(Scenario(f"node_{node}", nodes=[str(node)]) for node in graph.nodes())
+
+    for scenario in scenarios:
+        missing_edges = [edge for edge in scenario.edges if not graph.has_edge(*edge)]
+        missing_nodes = [node for node in scenario.nodes if node not in graph]
+        if missing_edges or missing_nodes:
+            raise ValueError(f"Scenario {scenario.name}: unknown edges {missing_edges} / nodes {missing_nodes}")
+    names = [scenario.name for scenario in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError("Scenario names must be unique")
+    return scenarios
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Recompute only the paths broken by link/node failures, per scenario, from a generated dataset."
+    )
+    parser.add_argument("-c", "--config", required=True, help="Run configuration the base dataset was generated with.")
+    parser.add_argument("--paths", help="Base paths file (default: <out_dir>/paths.jsonl.gz of the config).")
+    parser.add_argument("--scenarios", help="YAML list of scenarios: {name, edges: [[u, v], ...], nodes: [...]}.")
+    parser.add_argument("--fail-edge", nargs=2, action="append", metavar=("U", "V"), help="Failed edge (repeatable).")
+    parser.add_argument("--fail-node", action="append", metavar="NODE", help="Failed node (repeatable).")
+    parser.add_argument("--single-links", action="store_true", help="One scenario per topology edge.")
+    parser.add_argument("--single-nodes", action="store_true", help="One scenario per topology node.")
+    parser.add_argument(
+        "--output",
+        choices=["delta", "paths"],
+        default="delta",
+        help="delta: remove/add records for the rerouted flows only; paths: a full path file per scenario.",
+    )
+    parser.add_argument("--out-dir", help="Scenario output directory (default: <out_dir>/failures).")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Scenarios computed in parallel.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    setup_logging()
+    config = load_config(Path(args.config))
+
+    out_dir = Path(config.get("out_dir", "out"))
+    base_paths = Path(args.paths) if args.paths else out_dir / "paths.jsonl.gz"
+    failures_dir = Path(args.out_dir) if args.out_dir else out_dir / "failures"
+    ensure_out_dir(failures_dir)
+    directed = bool(config.get("directed", False))
+    weight_attr = config.get("edge_weight_attr")
+
+    graph = load_topology(Path(config["topology"]), directed=directed)
+    scenarios = load_scenarios(args, graph)
+    if not scenarios:
+        raise ValueError("No scenarios: pass --scenarios, --fail-edge/--fail-node, --single-links or --single-nodes")
+
+    start = time.perf_counter()
+    index = build_path_index(iter_paths_jsonl_gz(base_paths), directed=directed)
+    logging.info(
+        "Indexed %d flows over %d pairs from %s in %.2fs",
+        sum(len(flows) for flows in index.flows.values()),
+        len(index.paths),
+        base_paths,
+        time.perf_counter() - start,
+    )
+
+    suffix = "delta.jsonl.gz" if args.output == "delta" else "paths.jsonl.gz"
+    tasks = [
+        {"scenario": scenario, "output": args.output, "out_path": failures_dir / f"{scenario.name}.{suffix}"}
+        for scenario in scenarios
+    ]
+    init_args = (graph, index, weight_attr, base_paths)
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_run_scenario, tasks))
+    else:
+        _init_worker(*init_args)
+        results = [_run_scenario(task) for task in tasks]
+
+    write_json(
+        failures_dir / "scenarios.json",
+        {"base_paths": str(base_paths), "output": args.output, "scenarios": results},
+    )
+    total_affected = sum(result["affected_flows"] for result in results)
+    logging.info(
+        "Completed %d scenarios (%d rerouted flows in total) in %.2fs. Outputs written to %s",
+        len(results),
+        total_affected,
+        time.perf_counter() - start,
+        failures_dir,
+    )
+
+
+if __name__ == "__main__":
+    main()
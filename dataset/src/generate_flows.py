@@ -1,4 +1,5 @@
-from typing import Dict, List, Sequence, Tuple
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 import networkx as nx
 import numpy as np
@@ -7,27 +8,216 @@ import numpy as np
 Flow = Dict[str, object]
 
 
-def _gravity_probabilities(graph: nx.Graph, allow_self_flows: bool) -> Tuple[List[Tuple[str, str]], np.ndarray]:
+@dataclass
+class FlowColumns:
+    """Columnar flow batch: node indices into ``nodes`` plus per-flow demand."""
+
+    nodes: List[str]
+    src: np.ndarray
+    dst: np.ndarray
+    demand: np.ndarray
+    first_id: int = 0
+
+    def __len__(self) -> int:
+        return int(self.src.shape[0])
+
+    def iter_flows(self) -> Iterator[Flow]:
+        nodes = self.nodes
+        for offset, (s_idx, d_idx, demand) in enumerate(
+            zip(self.src.tolist(), self.dst.tolist(), self.demand.tolist())
+        ):
+            yield {"id": self.first_id + offset, "src": nodes[s_idx], "dst": nodes[d_idx], "demand": demand}
+
+    def to_dicts(self) -> List[Flow]:
+        return list(self.iter_flows())
+
+
+class AliasTable:
+    """Walker/Vose alias table for O(1) draws from a fixed discrete distribution."""
+
+    def __init__(self, weights: np.ndarray) -> None:
+        weights = np.asarray(weights, dtype=float)
+        n = weights.shape[0]
+        if n == 0 or weights.sum() <= 0:
+            raise ValueError("Alias table needs at least one positive weight.")
+        scaled = weights * (n / weights.sum())
+        prob = np.ones(n, dtype=float)
+        alias = np.arange(n, dtype=np.int64)
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s_idx = small.pop()
+            l_idx = large.pop()
+            prob[s_idx] = scaled[s_idx]
+            alias[s_idx] = l_idx
+            scaled[l_idx] = scaled[l_idx] + scaled[s_idx] - 1.0
+            (small if scaled[l_idx] < 1.0 else large).append(l_idx)
+        self.prob = prob
+        self.alias = alias
+
+    def lookup(self, uniforms: np.ndarray) -> np.ndarray:
+        """Map uniforms in [0, 1) to outcomes, one uniform per draw."""
+        n = self.prob.shape[0]
+        scaled = np.asarray(uniforms, dtype=float) * n
+        cols = np.minimum(scaled.astype(np.int64), n - 1)
+        keep = (scaled - cols) < self.prob[cols]
+        return np.where(keep, cols, self.alias[cols])
+
+    def sample(self, size: int, rng: np.random.RandomState) -> np.ndarray:
+        return self.lookup(rng.random_sample(size))
+
+
+def _gravity_masses(graph: nx.Graph) -> Tuple[List[str], np.ndarray]:
     nodes = list(graph.nodes())
     degrees = dict(graph.degree())
-    pairs: List[Tuple[str, str]] = []
-    weights: List[float] = []
-
-    for src in nodes:
-        for dst in nodes:
-            if not allow_self_flows and src == dst:
-                continue
-            weight = (degrees.get(src, 0) + 1) * (degrees.get(dst, 0) + 1)
-            if weight > 0:
-                pairs.append((src, dst))
-                weights.append(float(weight))
-
-    if not pairs:
+    return nodes, np.array([degrees.get(node, 0) + 1 for node in nodes], dtype=float)
+
+
+def _gravity_probabilities(graph: nx.Graph, allow_self_flows: bool) -> Tuple[List[Tuple[str, str]], np.ndarray]:
+    nodes, src_idx, dst_idx, probs = _gravity_pair_arrays(graph, allow_self_flows)
+    pairs = [(nodes[s], nodes[d]) for s, d in zip(src_idx.tolist(), dst_idx.tolist())]
+    return pairs, probs
+
+
+def _gravity_pair_arrays(
+    graph: nx.Graph, allow_self_flows: bool
+) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+    nodes, mass = _gravity_masses(graph)
+    weights = np.outer(mass, mass)
+    if not allow_self_flows:
+        np.fill_diagonal(weights, 0.0)
+    # Row-major order matches the historical nested src/dst loop.
+    src_idx, dst_idx = np.nonzero(weights > 0)
+    if src_idx.size == 0:
         raise ValueError("No valid source/destination pairs found for flow generation.")
 
-    probs = np.array(weights, dtype=float)
+    probs = weights[src_idx, dst_idx]
     probs /= probs.sum()
-    return pairs, probs
+    return nodes, src_idx, dst_idx, probs
+
+
+def _clone_rng(rng: np.random.RandomState | None) -> np.random.RandomState:
+    clone = np.random.RandomState()
+    clone.set_state(rng.get_state() if rng is not None else np.random.get_state())
+    return clone
+
+
+def _skip_uniforms(rng: np.random.RandomState, count: int, block: int = 1 << 20) -> None:
+    while count > 0:
+        step = min(block, count)
+        rng.random_sample(step)
+        count -= step
+
+
+class FlowSampler:
+    """Draw a fixed-size gravity flow set in chunks.
+
+    Pairs and demands come from separate RNG streams, so any sequence of
+    ``draw`` calls yields exactly the flows of one ``draw(count)`` call. With
+    ``sampler="choice"`` that single call also matches the historical
+    one-shot ``np.random.choice`` + ``np.random.lognormal`` output.
+    ``sampler="alias"`` scales to large topologies but draws a different stream.
+    """
+
+    def __init__(
+        self,
+        graph: nx.Graph,
+        count: int,
+        model: str = "gravity",
+        demand_scale: float = 10.0,
+        demand_sigma: float = 0.8,
+        allow_self_flows: bool = False,
+        sampler: str = "choice",
+        rng: np.random.RandomState | None = None,
+        first_id: int = 0,
+    ) -> None:
+        if model != "gravity":
+            raise ValueError(f"Unsupported flow model: {model}")
+
+        self.count = int(count)
+        self.allow_self_flows = allow_self_flows
+        self.sampler = sampler
+        self.next_id = first_id
+        self._end_id = first_id + self.count
+        self._log_scale = np.log(demand_scale)
+        self._sigma = demand_sigma
+
+        base = _clone_rng(rng)
+        if sampler == "choice":
+            self.nodes, self._src_idx, self._dst_idx, self._probs = _gravity_pair_arrays(graph, allow_self_flows)
+            # The one-shot path consumed `count` uniforms for pairs before any demand.
+            self._pair_rng = base
+            self._demand_rng = _clone_rng(base)
+            _skip_uniforms(self._demand_rng, self.count)
+        elif sampler == "alias":
+            self.nodes, mass = _gravity_masses(graph)
+            if len(self.nodes) == 0 or (not allow_self_flows and len(self.nodes) < 2):
+                raise ValueError("No valid source/destination pairs found for flow generation.")
+            self._table = AliasTable(mass)
+            pair_seed, redraw_seed, demand_seed = base.randint(0, 2**31 - 1, size=3)
+            self._pair_rng = np.random.RandomState(pair_seed)
+            self._redraw_rng = np.random.RandomState(redraw_seed)
+            self._demand_rng = np.random.RandomState(demand_seed)
+        else:
+            raise ValueError(f"Unsupported flow sampler: {sampler}")
+
+    @property
+    def remaining(self) -> int:
+        return self._end_id - self.next_id
+
+    def draw(self, size: int) -> FlowColumns:
+        size = min(int(size), self.remaining)
+        if self.sampler == "choice":
+            indices = self._pair_rng.choice(len(self._probs), size=size, p=self._probs)
+            src, dst = self._src_idx[indices], self._dst_idx[indices]
+        else:
+            src, dst = self._draw_alias_pairs(size)
+
+        demand = self._demand_rng.lognormal(mean=self._log_scale, sigma=self._sigma, size=size)
+        columns = FlowColumns(nodes=self.nodes, src=src, dst=dst, demand=demand, first_id=self.next_id)
+        self.next_id += size
+        return columns
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[FlowColumns]:
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        while self.remaining > 0:
+            yield self.draw(chunk_size)
+
+    def _draw_alias_pairs(self, size: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Gravity weights factorize into src and dst masses, so endpoints are drawn
+        independently; self pairs are redrawn one flow at a time, in flow order."""
+        uniforms = self._pair_rng.random_sample((size, 2))
+        src = self._table.lookup(uniforms[:, 0])
+        dst = self._table.lookup(uniforms[:, 1])
+        if not self.allow_self_flows:
+            for i in np.flatnonzero(src == dst).tolist():
+                while src[i] == dst[i]:
+                    src[i], dst[i] = self._table.lookup(self._redraw_rng.random_sample(2))
+        return src, dst
+
+
+def generate_flow_arrays(
+    graph: nx.Graph,
+    count: int,
+    model: str = "gravity",
+    demand_scale: float = 10.0,
+    demand_sigma: float = 0.8,
+    allow_self_flows: bool = False,
+    sampler: str = "choice",
+    rng: np.random.RandomState | None = None,
+) -> FlowColumns:
+    """Generate flows as columnar arrays (see :class:`FlowSampler`)."""
+    return FlowSampler(
+        graph,
+        count,
+        model=model,
+        demand_scale=demand_scale,
+        demand_sigma=demand_sigma,
+        allow_self_flows=allow_self_flows,
+        sampler=sampler,
+        rng=rng,
+    ).draw(count)
 
 
 def generate_flows(
@@ -38,32 +228,34 @@ def generate_flows(
     demand_sigma: float = 0.8,
     allow_self_flows: bool = False,
 ) -> List[Flow]:
-    if model != "gravity":
-        raise ValueError(f"Unsupported flow model: {model}")
+    return generate_flow_arrays(
+        graph,
+        count,
+        model=model,
+        demand_scale=demand_scale,
+        demand_sigma=demand_sigma,
+        allow_self_flows=allow_self_flows,
+    ).to_dicts()
 
-    pairs, probs = _gravity_probabilities(graph, allow_self_flows)
-    indices = np.random.choice(len(pairs), size=count, p=probs)
 
-    flows: List[Flow] = []
-    for flow_id, pair_idx in enumerate(indices):
-        src, dst = pairs[pair_idx]
-        demand = float(np.random.lognormal(mean=np.log(demand_scale), sigma=demand_sigma))
-        flows.append({"id": int(flow_id), "src": src, "dst": dst, "demand": demand})
-    return flows
+class FlowCsvWriter:
+    """Incremental writer for flows.csv; ``write_flows_csv`` wraps it for one-shot use."""
 
+    fieldnames = ["id", "src", "dst", "demand"]
 
-def write_flows_csv(flows: Sequence[Flow], path) -> None:
-    import csv
-    from pathlib import Path
+    def __init__(self, path) -> None:
+        import csv
+        from pathlib import Path
 
-    out_path = Path(path)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path = Path(path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = out_path.open("w", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._fh, fieldnames=self.fieldnames)
+        self._writer.writeheader()
 
-    with out_path.open("w", encoding="utf-8", newline="") as fh:
-        writer = csv.DictWriter(fh, fieldnames=["id", "src", "dst", "demand"])
-        writer.writeheader()
+    def write(self, flows: Iterable[Flow]) -> None:
         for flow in flows:
-            writer.writerow(
+            self._writer.writerow(
                 {
                     "id": flow["id"],
                     "src": str(flow["src"]),
@@ -71,3 +263,17 @@ def write_flows_csv(flows: Sequence[Flow], path) -> None:
                     "demand": f"{float(flow['demand']):.6f}",
                 }
             )
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def __enter__(self) -> "FlowCsvWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def write_flows_csv(flows: Iterable[Flow], path) -> None:
+    with FlowCsvWriter(path) as writer:
+        writer.write(flows)
@@ -1,14 +1,27 @@
 import argparse
 import logging
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 if __package__ is None or __package__ == "":
     repo_root = Path(__file__).resolve().parent.parent
     sys.path.insert(0, str(repo_root))
 
-from src.compute_paths import compute_shortest_paths, write_paths_jsonl_gz
-from src.generate_flows import generate_flows, write_flows_csv
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import networkx as nx
+import numpy as np
+
+from src.compute_paths import (
+    PathCache,
+    PathRecord,
+    compute_shortest_paths,
+    iter_paths_jsonl_gz,
+    write_paths,
+)
+from src.generate_flows import FlowCsvWriter, FlowSampler, generate_flow_arrays, write_flows_csv
 from src.load_topology import export_topology, load_topology
 from src.utils import ensure_out_dir, load_config, set_seed, setup_logging
 
@@ -16,6 +29,7 @@ from src.utils import ensure_out_dir, load_config, set_seed, setup_logging
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Generate synthetic flow/path dataset from a topology.")
     parser.add_argument("-c", "--config", default="configs/run.yaml", help="Path to YAML run configuration.")
+    parser.add_argument("-w", "--workers", type=int, help="Override the config's worker process count.")
     return parser.parse_args()
 
 
@@ -43,28 +57,166 @@ def main() -> None:
     logging.info("Topology nodes=%d edges=%d", graph.number_of_nodes(), graph.number_of_edges())
 
     flow_count = int(config.get("flow_count", 1000))
-    flow_model = config.get("flow_model", "gravity")
-    demand_scale = float(config.get("demand_scale", 10.0))
-    demand_sigma = float(config.get("demand_sigma", 0.8))
-    allow_self = bool(config.get("allow_self_flows", False))
-
-    logging.info("Generating %d flows with model=%s", flow_count, flow_model)
-    flows = generate_flows(
-        graph,
-        count=flow_count,
-        model=flow_model,
-        demand_scale=demand_scale,
-        demand_sigma=demand_sigma,
-        allow_self_flows=allow_self,
-    )
-    write_flows_csv(flows, out_dir / "flows.csv")
+    flow_kwargs: Dict[str, Any] = {
+        "model": config.get("flow_model", "gravity"),
+        "demand_scale": float(config.get("demand_scale", 10.0)),
+        "demand_sigma": float(config.get("demand_sigma", 0.8)),
+        "allow_self_flows": bool(config.get("allow_self_flows", False)),
+        "sampler": config.get("flow_sampler", "choice"),
+    }
+    chunk_size = int(config.get("chunk_size") or 0)
+    workers = int(args.workers if args.workers is not None else config.get("workers") or 1)
+    shards = int(config.get("shards") or workers)
+    # Path outputs by extension: "jsonl.gz" (default) and/or the columnar "npz".
+    path_formats = list(config.get("path_formats") or ["jsonl.gz"])
+    path_outputs = [out_dir / f"paths.{fmt}" for fmt in path_formats]
+
+    if shards > 1 or workers > 1:
+        logging.info("Generating %d flows in %d shards on %d workers", flow_count, shards, workers)
+        _run_sharded(
+            graph,
+            flow_count,
+            flow_kwargs,
+            seed=seed,
+            shards=shards,
+            workers=workers,
+            chunk_size=chunk_size,
+            weight_attr=weight_attr,
+            out_dir=out_dir,
+            path_formats=path_formats,
+            merge=config.get("shard_output", "merged") == "merged",
+        )
+        logging.info("Completed run. Outputs written to %s", out_dir)
+        return
+
+    if chunk_size > 0:
+        logging.info("Streaming %d flows in chunks of %d with %s", flow_count, chunk_size, flow_kwargs)
+        sampler = FlowSampler(graph, flow_count, **flow_kwargs)
+        paths = _stream_paths(graph, sampler, chunk_size, weight_attr, out_dir / "flows.csv")
+        write_paths(paths, path_outputs)
+        logging.info("Completed run. Outputs written to %s", out_dir)
+        return
+
+    logging.info("Generating %d flows with %s", flow_count, flow_kwargs)
+    flows = generate_flow_arrays(graph, count=flow_count, **flow_kwargs)
+    write_flows_csv(flows.iter_flows(), out_dir / "flows.csv")
 
     logging.info("Computing shortest paths for %d flows", len(flows))
-    paths = compute_shortest_paths(graph, flows, weight_attr=weight_attr)
-    write_paths_jsonl_gz(paths, out_dir / "paths.jsonl.gz")
+    paths = compute_shortest_paths(graph, flows.iter_flows(), weight_attr=weight_attr)
+    write_paths(paths, path_outputs)
 
     logging.info("Completed run. Outputs written to %s", out_dir)
 
 
+def _shard_bounds(count: int, shards: int) -> List[Tuple[int, int]]:
+    """Split [0, count) into `shards` contiguous (first_id, size) ranges."""
+    base, extra = divmod(count, shards)
+    bounds: List[Tuple[int, int]] = []
+    start = 0
+    for shard in range(shards):
+        size = base + (1 if shard < extra else 0)
+        bounds.append((start, size))
+        start += size
+    return bounds
+
+
+def _run_shard(task: Dict[str, Any]) -> Tuple[int, int]:
+    # Each shard owns an RNG derived from the run seed, independent of the global state.
+    rng = np.random.RandomState(np.random.MT19937(task["seed_seq"]))
+    sampler = FlowSampler(task["graph"], task["count"], rng=rng, first_id=task["first_id"], **task["flow_kwargs"])
+    cache: PathCache = {}
+    chunk_size = task["chunk_size"] or max(task["count"], 1)
+    paths = _stream_paths(task["graph"], sampler, chunk_size, task["weight_attr"], task["flows_path"], cache=cache)
+    write_paths(paths, task["paths_paths"])
+    return task["shard"], task["count"]
+
+
+def _run_sharded(
+    graph: nx.Graph,
+    flow_count: int,
+    flow_kwargs: Dict[str, Any],
+    seed: int,
+    shards: int,
+    workers: int,
+    chunk_size: int,
+    weight_attr: Optional[str],
+    out_dir: Path,
+    path_formats: List[str],
+    merge: bool = True,
+) -> None:
+    """Generate flows/paths in independent shards on a process pool.
+
+    Shard k draws from ``SeedSequence(seed).spawn(shards)[k]``, so output depends
+    only on the seed and shard count, never on scheduling.
+    """
+    seed_seqs = np.random.SeedSequence(seed).spawn(shards)
+    part_dir = out_dir / "parts" if merge else out_dir
+    part_dir.mkdir(parents=True, exist_ok=True)
+    # Merging goes through the JSONL parts; other formats are rebuilt from the merged stream.
+    part_formats = ["jsonl.gz"] if merge else path_formats
+    tasks = [
+        {
+            "shard": shard,
+            "graph": graph,
+            "count": size,
+            "first_id": first_id,
+            "seed_seq": seed_seqs[shard],
+            "flow_kwargs": flow_kwargs,
+            "chunk_size": chunk_size,
+            "weight_attr": weight_attr,
+            "flows_path": part_dir / f"flows.part-{shard:04d}.csv",
+            "paths_paths": [part_dir / f"paths.part-{shard:04d}.{fmt}" for fmt in part_formats],
+        }
+        for shard, (first_id, size) in enumerate(_shard_bounds(flow_count, shards))
+    ]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for shard, size in pool.map(_run_shard, tasks):
+            logging.info("Shard %d finished (%d flows)", shard, size)
+
+    if merge:
+        _merge_parts([t["flows_path"] for t in tasks], out_dir / "flows.csv", skip_header=True)
+        # Concatenated gzip members form a valid multi-member gzip stream.
+        merged = out_dir / "paths.jsonl.gz"
+        _merge_parts([t["paths_paths"][0] for t in tasks], merged, skip_header=False)
+        shutil.rmtree(part_dir)
+        others = [out_dir / f"paths.{fmt}" for fmt in path_formats if fmt != "jsonl.gz"]
+        if others:
+            write_paths(iter_paths_jsonl_gz(merged), others)
+        if "jsonl.gz" not in path_formats:
+            merged.unlink()
+
+
+def _merge_parts(parts: List[Path], out_path: Path, skip_header: bool) -> None:
+    with out_path.open("wb") as out_fh:
+        for idx, part in enumerate(parts):
+            with part.open("rb") as in_fh:
+                if skip_header and idx > 0:
+                    in_fh.readline()
+                shutil.copyfileobj(in_fh, out_fh)
+
+
+def _stream_paths(
+    graph: nx.Graph,
+    sampler: FlowSampler,
+    chunk_size: int,
+    weight_attr: Optional[str],
+    flows_path: Path,
+    cache: Optional[PathCache] = None,
+) -> Iterator[PathRecord]:
+    """Draw flows chunk by chunk, append them to flows.csv, and yield their paths.
+
+    Only one chunk of flows and paths is alive at a time; the pair cache is
+    bounded by the number of distinct (src, dst) pairs, not the flow count.
+    """
+    cache = {} if cache is None else cache
+    with FlowCsvWriter(flows_path) as writer:
+        for chunk in sampler.iter_chunks(chunk_size):
+            flows = chunk.to_dicts()
+            writer.write(flows)
+            yield from compute_shortest_paths(graph, flows, weight_attr=weight_attr, cache=cache)
+        logging.info("Streamed %d flows (%d distinct pairs)", sampler.next_id, len(cache))
+
+
 if __name__ == "__main__":
     main()
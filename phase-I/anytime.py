@@ -0,0 +1,313 @@
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pulp
+
+from greedy.local_search import local_search
+from greedy.main import greedy_set_cover
+from ilp.highs import build_set_cover_highs, solve_highs
+from ilp.ilp import SolveReport, SolverOptions, build_set_cover_model, relative_gap, solve_with_report
+from utils.coverage import CoverageKernel
+from utils.data import FlowDataset, load_paths
+from utils.reduce import aggregate_flows, drop_dominated
+
+
+class IncumbentLog:
+    """Best cover so far, rewritten to ``solution.json`` whenever it improves.
+
+    Every offered selection is checked against all flows before it is kept, and
+    the file is replaced atomically, so at any moment ``solution.json`` holds a
+    valid cover. ``trajectory`` records each improvement with its source and
+    time.
+    """
+
+    def __init__(self, dataset: FlowDataset, out_dir: Path, deadline: float, start: float, reserve: float) -> None:
+        self.dataset = dataset
+        self.kernel = CoverageKernel.of(dataset)
+        self.out_dir = out_dir
+        self.deadline = deadline
+        self.start = start
+        self.reserve = reserve
+        self.selected: List[int] | None = None
+        self.bound: float | None = None
+        self.trajectory: List[Dict[str, Any]] = []
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float:
+        return self.deadline - self.elapsed()
+
+    def offer(self, selected: List[int], source: str, bound: float | None = None) -> bool:
+        """Keep ``selected`` if it is a smaller valid cover; returns whether it was kept."""
+        selected = sorted(set(selected))
+        with self._lock:
+            self._raise_bound(bound)
+            if self.selected is not None and len(selected) >= len(self.selected):
+                return False
+            if self.kernel.uncovered_count(selected):
+                self.rejected += 1
+                return False
+            self.selected = selected
+            self.trajectory.append(
+                {
+                    "seconds": round(self.elapsed(), 4),
+                    "time": datetime.now().isoformat(timespec="milliseconds"),
+                    "objective": len(selected),
+                    "bound": self.bound,
+                    "source": source,
+                }
+            )
+            self.write()
+            return True
+
+    def update_bound(self, bound: float | None) -> None:
+        with self._lock:
+            self._raise_bound(bound)
+
+    def _raise_bound(self, bound: float | None) -> None:
+        if bound is not None and (self.bound is None or bound > self.bound):
+            self.bound = bound
+
+    def status(self) -> str:
+        if self.selected is not None and self.bound is not None and self.bound >= len(self.selected) - 1e-9:
+            return "Optimal"
+        return "Feasible"
+
+    def write(self, complete: bool = False) -> None:
+        objective = float(len(self.selected))
+        solution: Dict[str, Any] = {
+            "status": self.status(),
+            "objective": objective,
+            "bound": self.bound,
+            "gap": relative_gap(objective, self.bound),
+            "selected_switch_ids": self.selected,
+            "selected_switch_names": [self.dataset.sid_to_name[sid] for sid in self.selected],
+            "deadline": self.deadline,
+            "elapsed": round(self.elapsed(), 4),
+            "complete": complete,
+            "trajectory": self.trajectory,
+        }
+        solution_path = self.out_dir / "solution.json"
+        tmp_path = solution_path.with_name(solution_path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fh:
+            json.dump(solution, fh, indent=2, sort_keys=True)
+        os.replace(tmp_path, solution_path)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Anytime placement: best cover found within a wall-clock deadline.")
+    parser.add_argument("--input", required=True, help="Path to flow paths JSONL (.gz ok) or columnar .npz.")
+    parser.add_argument("--deadline", type=float, required=True, help="Wall-clock budget in seconds, loading included.")
+    parser.add_argument("--out-dir", help="Output directory (default: out/run_<timestamp>).")
+    parser.add_argument(
+        "--cache",
+        choices=["use", "rebuild", "off"],
+        default="use",
+        help="Parsed-dataset sidecar cache (<input>.cache.npz): use, rebuild, or bypass it.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["highs", "cbc"],
+        default="highs",
+        help="MIP backend; HiGHS reports every improving incumbent, CBC only its final one.",
+    )
+    parser.add_argument("--threads", type=int, help="Solver threads.")
+    parser.add_argument(
+        "--local-search-share",
+        type=float,
+        default=0.2,
+        help="Fraction of the time left after greedy spent on local search before the MIP.",
+    )
+    parser.add_argument(
+        "--reserve",
+        type=float,
+        default=1.0,
+        help="Seconds kept back from the MIP for extracting and writing the final result.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for local-search plateau moves.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    start = time.perf_counter()
+    args = parse_args()
+    dataset = load_paths(Path(args.input), cache=args.cache)
+    out_dir = Path(args.out_dir) if args.out_dir else _default_out_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run_anytime(
+        dataset,
+        out_dir,
+        args.deadline,
+        start=start,
+        backend=args.backend,
+        threads=args.threads,
+        local_search_share=args.local_search_share,
+        reserve=args.reserve,
+        seed=args.seed,
+    )
+
+
+def run_anytime(
+    dataset: FlowDataset,
+    out_dir: Path,
+    deadline: float,
+    start: float | None = None,
+    backend: str = "highs",
+    threads: int | None = None,
+    local_search_share: float = 0.2,
+    reserve: float = 1.0,
+    seed: int = 0,
+) -> List[int]:
+    """Greedy, then local search, then a warm-started MIP, each limited to the time left.
+
+    Greedy always runs to completion so there is a cover to fall back on; the
+    later stages only start while more than ``reserve`` seconds remain.
+    Dropping dominated rows gets the same share of the time as local search
+    and stops where it is when that runs out. ``start`` is the
+    ``perf_counter`` time the deadline counts from (default: now), so loading
+    counts against it too.
+    """
+    log = IncumbentLog(dataset, out_dir, deadline, time.perf_counter() if start is None else start, reserve)
+    stages = ["greedy"]
+
+    reduction = aggregate_flows(dataset)
+    log.offer(greedy_set_cover(reduction.dataset, weights=reduction.counts)[0], "greedy")
+
+    budget = (log.remaining() - reserve) * local_search_share
+    if budget > 0:
+        stages.append("dominance")
+        reduction = drop_dominated(reduction, deadline=time.perf_counter() + budget)
+    instance = reduction.dataset
+
+    budget = (log.remaining() - reserve) * local_search_share
+    if budget > 0:
+        stages.append("local_search")
+        local_search(
+            instance,
+            log.selected,
+            max_iterations=10**9,
+            time_limit=budget,
+            seed=seed,
+            on_improve=lambda best: log.offer(best, "local_search"),
+            reduce=False,
+        )
+
+    report = SolveReport(status="NotSolved")
+    budget = log.remaining() - reserve
+    if budget > 0:
+        stages.append("mip")
+        options = SolverOptions(backend=backend, time_limit=budget, threads=threads)
+        report = _solve_mip(instance, options, log)
+        log.update_bound(report.bound)
+
+    log.write(complete=True)
+    _write_summary(log, stages, report)
+    print(
+        f"[done] Anytime {log.trajectory[0]['objective']} -> {len(log.selected)} switches | "
+        f"Status={log.status()} | {log.elapsed():.2f}s of {deadline:.2f}s | out={out_dir}"
+    )
+    return log.selected
+
+
+def _solve_mip(instance: FlowDataset, options: SolverOptions, log: IncumbentLog) -> SolveReport:
+    if options.backend == "highs":
+        model = build_set_cover_highs(instance)
+        # Building the model takes time out of the MIP's budget.
+        options = replace(options, time_limit=log.remaining() - log.reserve)
+        if options.time_limit <= 0:
+            return SolveReport(status="Not Solved")
+        return solve_highs(
+            model,
+            options=options,
+            warm_start=log.selected,
+            on_incumbent=lambda selection, bound: log.offer(selection, "mip", bound),
+        )
+
+    # CBC can overrun its own time limit (e.g. in root cut generation), so it runs
+    # in a child process that is killed, along with the CBC binary it spawned, if
+    # the deadline comes first. Its scratch files go to a private directory removed
+    # either way. If the child dies or is killed, the earlier incumbent stands.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with tempfile.TemporaryDirectory(prefix="anytime_cbc_") as scratch:
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_cbc_worker, args=(instance, options, log.selected, scratch, sender), daemon=True
+        )
+        process.start()
+        sender.close()
+        try:
+            if not receiver.poll(max(0.0, log.remaining() - log.reserve / 2)):
+                _kill_worker(process.pid)
+                return SolveReport(status="Not Solved")
+            selection, report = receiver.recv()
+        except (EOFError, OSError):
+            _kill_worker(process.pid)
+            return SolveReport(status="Not Solved")
+        finally:
+            receiver.close()
+            process.join()
+    if report.objective is not None:
+        log.offer(selection, "mip", report.bound)
+    return report
+
+
+def _kill_worker(pid: int) -> None:
+    """SIGKILL the worker's process group, or just the worker if it has not called setsid yet."""
+    try:
+        # Before setsid the worker shares our group, which must not be killed.
+        if os.getpgid(pid) == pid:
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGKILL)
+    except OSError:  # ProcessLookupError included: it already exited
+        pass
+
+
+def _cbc_worker(instance: FlowDataset, options: SolverOptions, warm_ids: List[int], scratch: str, conn) -> None:
+    os.setsid()
+    os.environ["TMPDIR"] = os.environ["TMP"] = scratch
+    tempfile.tempdir = scratch
+    model, x_vars = build_set_cover_model(instance)
+    chosen = set(warm_ids)
+    warm_start = {var: 1.0 if sid in chosen else 0.0 for sid, var in x_vars.items()}
+    report = solve_with_report(model, options=options, warm_start=warm_start)
+    has_solution = report.objective is not None
+    conn.send(([sid for sid, var in x_vars.items() if has_solution and (pulp.value(var) or 0) > 0.5], report))
+    conn.close()
+
+
+def _write_summary(log: IncumbentLog, stages: List[str], report: SolveReport) -> None:
+    with (log.out_dir / "summary.txt").open("w", encoding="utf-8") as fh:
+        fh.write("Model: anytime\n")
+        fh.write(f"Deadline: {log.deadline}s | Elapsed: {log.elapsed():.3f}s\n")
+        fh.write(f"Stages: {', '.join(stages)} (MIP status: {report.status})\n")
+        fh.write(f"Status: {log.status()}\n")
+        fh.write(f"Objective: {len(log.selected)}\n")
+        fh.write(f"Bound: {log.bound} | Gap: {relative_gap(float(len(log.selected)), log.bound)}\n")
+        for entry in log.trajectory:
+            fh.write(f"  {entry['seconds']:>9.3f}s  {entry['objective']:>6}  {entry['source']}\n")
+        if log.rejected:
+            fh.write(f"Rejected incumbents (not a full cover): {log.rejected}\n")
+
+
+def _default_out_dir() -> Path:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path("out") / f"run_{ts}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+import argparse
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Set, Tuple
+
+from utils.coverage import CoverageKernel
+from utils.data import FlowDataset, FlowDelta, load_flow_delta, load_paths
+from utils.eval import load_solution
+from utils.reduce import aggregate_flows
+
+RowKey = Tuple[int, ...]
+
+
+class IncrementalCover:
+    """A cover kept up to date under flow churn.
+
+    Flows are tracked as distinct switch sets (rows) with a multiplicity, so an
+    added or removed flow only touches its own row and the rows of switches that
+    are added or pruned: the cost of a delta depends on its size, not on the
+    number of flows.
+    """
+
+    def __init__(self, sid_to_name: List[str], selected: Iterable[int]) -> None:
+        self.sid_to_name = list(sid_to_name)
+        self.name_to_sid = {name: sid for sid, name in enumerate(self.sid_to_name)}
+        self.selected: Set[int] = set(selected)
+        self.row_flows: Dict[RowKey, int] = {}  # row -> number of flows on it
+        self.row_cover: Dict[RowKey, int] = {}  # row -> selected switches on it
+        self.switch_rows: Dict[int, Set[RowKey]] = {}
+        self.uncovered: Set[RowKey] = set()
+
+    @classmethod
+    def from_dataset(cls, dataset: FlowDataset, selected: Iterable[int]) -> "IncrementalCover":
+        selected = list(selected)
+        state = cls(dataset.sid_to_name, selected)
+        reduction = aggregate_flows(dataset)
+        cover_counts = CoverageKernel(reduction.dataset).coverage_counts(selected)
+        for path, flows, covered in zip(reduction.dataset.P, reduction.counts.tolist(), cover_counts.tolist()):
+            state._insert_row(tuple(int(sid) for sid in path), flows, covered)
+        return state
+
+    @property
+    def n_flows(self) -> int:
+        return sum(self.row_flows.values())
+
+    def _key(self, path_nodes: Sequence[str], create: bool = True) -> RowKey | None:
+        """Row of a path; unknown switches are registered, or give ``None`` when ``create`` is false."""
+        sids = set()
+        for node in path_nodes:
+            sid = self.name_to_sid.get(node)
+            if sid is None:
+                if not create:
+                    return None
+                sid = len(self.sid_to_name)
+                self.name_to_sid[node] = sid
+                self.sid_to_name.append(node)
+            sids.add(sid)
+        return tuple(sorted(sids))
+
+    def _insert_row(self, key: RowKey, flows: int, covered: int) -> None:
+        self.row_flows[key] = flows
+        self.row_cover[key] = covered
+        for sid in key:
+            self.switch_rows.setdefault(sid, set()).add(key)
+        if covered == 0:
+            self.uncovered.add(key)
+
+    def _delete_row(self, key: RowKey) -> None:
+        del self.row_flows[key]
+        del self.row_cover[key]
+        for sid in key:
+            self.switch_rows[sid].discard(key)
+        self.uncovered.discard(key)
+
+    def add_flow(self, path_nodes: Sequence[str]) -> RowKey:
+        key = self._key(path_nodes)
+        if key in self.row_flows:
+            self.row_flows[key] += 1
+        else:
+            self._insert_row(key, 1, sum(1 for sid in key if sid in self.selected))
+        return key
+
+    def remove_flow(self, path_nodes: Sequence[str]) -> RowKey | None:
+        """Drop one flow with this path; ``None`` when no such flow is tracked."""
+        key = self._key(path_nodes, create=False)
+        flows = None if key is None else self.row_flows.get(key)
+        if flows is None:
+            return None
+        if flows > 1:
+            self.row_flows[key] = flows - 1
+        else:
+            self._delete_row(key)
+        return key
+
+    def select(self, sid: int) -> None:
+        self.selected.add(sid)
+        for key in self.switch_rows.get(sid, ()):
+            self.row_cover[key] += 1
+            self.uncovered.discard(key)
+
+    def deselect(self, sid: int) -> None:
+        self.selected.discard(sid)
+        for key in self.switch_rows.get(sid, ()):
+            self.row_cover[key] -= 1
+            if self.row_cover[key] == 0:
+                self.uncovered.add(key)
+
+    def repair(self) -> List[int]:
+        """Greedily select switches until no row is uncovered; only uncovered rows are scanned."""
+        added: List[int] = []
+        while self.uncovered:
+            gains: Dict[int, int] = {}
+            for key in self.uncovered:
+                for sid in key:
+                    gains[sid] = gains.get(sid, 0) + 1
+            sid = min(gains, key=lambda s: (-gains[s], s))
+            self.select(sid)
+            added.append(sid)
+        return added
+
+    def prune(self, candidates: Iterable[int]) -> List[int]:
+        """Deselect candidate switches whose rows are all covered by another selected switch."""
+        pruned: List[int] = []
+        for sid in sorted(set(candidates) & self.selected):
+            if all(self.row_cover[key] >= 2 for key in self.switch_rows.get(sid, ())):
+                self.deselect(sid)
+                pruned.append(sid)
+        return pruned
+
+    def apply(self, delta: FlowDelta, prune: bool = False) -> Dict[str, Any]:
+        """Apply a delta, repair coverage and optionally prune switches the delta made redundant."""
+        start = time.perf_counter()
+        touched: Set[int] = set()
+        missing = 0
+        for _, path_nodes in delta.removed:
+            key = self.remove_flow(path_nodes)
+            if key is None:
+                missing += 1
+            else:
+                touched.update(key)
+        for _, path_nodes in delta.added:
+            self.add_flow(path_nodes)
+
+        repaired = self.repair()
+        pruned: List[int] = []
+        if prune:
+            # Removals and new selections are the only ways a switch can become redundant.
+            for sid in repaired:
+                for key in self.switch_rows.get(sid, ()):
+                    touched.update(key)
+            pruned = self.prune(touched)
+        return {
+            "added_flows": len(delta.added),
+            "removed_flows": len(delta.removed) - missing,
+            "missing_flows": missing,
+            "repaired_switches": [self.sid_to_name[sid] for sid in repaired],
+            "pruned_switches": [self.sid_to_name[sid] for sid in pruned],
+            "seconds": time.perf_counter() - start,
+        }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Incremental switch re-placement from flow delta files.")
+    parser.add_argument("--input", required=True, help="Path to the base flow paths JSONL (.gz ok) or columnar .npz.")
+    parser.add_argument("--solution", required=True, help="solution.json placed for the base flows.")
+    parser.add_argument(
+        "--delta",
+        required=True,
+        action="append",
+        help="Delta JSONL of path records with op add/remove (repeat to apply several in order).",
+    )
+    parser.add_argument("--out-dir", help="Output directory (default: out/run_<timestamp>).")
+    parser.add_argument(
+        "--cache",
+        choices=["use", "rebuild", "off"],
+        default="use",
+        help="Parsed-dataset sidecar cache (<input>.cache.npz): use, rebuild, or bypass it.",
+    )
+    parser.add_argument("--prune", action="store_true", help="Drop switches a delta made redundant.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    dataset = load_paths(Path(args.input), cache=args.cache)
+    out_dir = Path(args.out_dir) if args.out_dir else _default_out_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run_incremental(dataset, Path(args.solution), [Path(p) for p in args.delta], out_dir, prune=args.prune)
+
+
+def run_incremental(
+    dataset: FlowDataset, solution_path: Path, delta_paths: List[Path], out_dir: Path, prune: bool = False
+) -> None:
+    initial_ids, initial = load_solution(dataset, solution_path)
+    state = IncrementalCover.from_dataset(dataset, initial_ids)
+    deltas = []
+    for delta_path in delta_paths:
+        report = state.apply(load_flow_delta(delta_path), prune=prune)
+        report["delta"] = str(delta_path)
+        deltas.append(report)
+
+    selected_ids = sorted(state.selected)
+    solution: Dict[str, Any] = {
+        "status": "Incremental",
+        "objective": len(selected_ids),
+        "initial_objective": len(initial_ids),
+        "selected_switch_ids": selected_ids,
+        "selected_switch_names": [state.sid_to_name[sid] for sid in selected_ids],
+        "deltas": deltas,
+    }
+
+    solution_out = out_dir / "solution.json"
+    with solution_out.open("w", encoding="utf-8") as fh:
+        json.dump(solution, fh, indent=2, sort_keys=True)
+
+    summary_path = out_dir / "summary.txt"
+    with summary_path.open("w", encoding="utf-8") as fh:
+        fh.write("Model: incremental\n")
+        fh.write(f"Start: {solution_path} ({len(initial_ids)} switches)\n")
+        for report in deltas:
+            fh.write(
+                f"Delta {report['delta']}: +{report['added_flows']} -{report['removed_flows']} flows | "
+                f"repaired {len(report['repaired_switches'])} | pruned {len(report['pruned_switches'])} | "
+                f"{report['seconds']:.4f}s\n"
+            )
+        fh.write(f"Objective: {solution['objective']}\n")
+        fh.write(f"Flows: {state.n_flows} | Uncovered: {len(state.uncovered)}\n")
+
+    print(f"[done] Incremental {len(initial_ids)} -> {len(selected_ids)} switches | out={out_dir}")
+
+
+def _default_out_dir() -> Path:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path("out") / f"run_{ts}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import argparse
+import json
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+from utils.coverage import CoverageKernel, repair_cover
+from utils.data import FlowDataset, load_paths
+from utils.eval import evaluate_cover, load_solution
+from utils.reduce import reduce_flows
+
+
+class CoverState:
+    """A switch selection with per-flow coverage counts kept up to date.
+
+    ``unique[s]`` counts the flows selected switch ``s`` covers alone, so a
+    drop test is a lookup. Every add and remove touches only the switch's own
+    flows and, for flows whose count moves to or from 1, the switches on their paths.
+    """
+
+    def __init__(self, kernel: CoverageKernel, selected: List[int]) -> None:
+        self.dataset = kernel.dataset
+        self.counts = kernel.coverage_counts(selected)
+        self.selected = np.zeros(kernel.n_switches, dtype=bool)
+        self.selected[np.asarray(selected, dtype=np.int64)] = True
+        self.unique = np.zeros(kernel.n_switches, dtype=np.int64)
+        self._shift_unique(np.flatnonzero(self.counts == 1), 1)
+
+    @property
+    def size(self) -> int:
+        return int(self.selected.sum())
+
+    def selection(self) -> List[int]:
+        return np.flatnonzero(self.selected).tolist()
+
+    def _shift_unique(self, flows: np.ndarray, delta: int) -> None:
+        """Add ``delta`` to the one selected switch on each of ``flows`` (all covered exactly once)."""
+        if flows.shape[0]:
+            switches = self.dataset.paths_of(flows)
+            np.add.at(self.unique, switches[self.selected[switches]], delta)
+
+    def add(self, sid: int) -> None:
+        flows = self.dataset.flows_of(sid)
+        before = self.counts[flows]
+        self._shift_unique(flows[before == 1], -1)
+        self.unique[sid] = int((before == 0).sum())
+        self.counts[flows] += 1
+        self.selected[sid] = True
+
+    def remove(self, sid: int) -> None:
+        flows = self.dataset.flows_of(sid)
+        self.selected[sid] = False
+        self.unique[sid] = 0
+        self.counts[flows] -= 1
+        self._shift_unique(flows[self.counts[flows] == 1], 1)
+
+    def can_drop(self, sid: int) -> bool:
+        return bool(self.unique[sid] == 0)
+
+    def redundant(self) -> List[int]:
+        """Selected switches that cover no flow alone."""
+        return np.flatnonzero(self.selected & (self.unique == 0)).tolist()
+
+    def swaps(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Every 1-for-1 swap that keeps the cover, as ``(out, in)`` arrays sorted by ``out``.
+
+        Unselected ``in`` must lie on every flow selected ``out`` covers alone.
+        One pass over the flows covered exactly once counts, per (owner,
+        switch) pair, how many of the owner's flows the switch is on.
+        """
+        flows = np.flatnonzero(self.counts == 1)
+        switches = self.dataset.paths_of(flows)
+        on_selected = self.selected[switches]
+        lengths = self.dataset.indptr[flows + 1] - self.dataset.indptr[flows]
+        owners = np.repeat(switches[on_selected], lengths)[~on_selected]
+        n_switches = self.selected.shape[0]
+        pairs, hits = np.unique(owners * n_switches + switches[~on_selected], return_counts=True)
+        out_ids, in_ids = np.divmod(pairs, n_switches)
+        keep = hits == self.unique[out_ids]
+        return out_ids[keep], in_ids[keep]
+
+
+def _drop_redundant(state: CoverState) -> int:
+    dropped = 0
+    for sid in state.redundant():
+        # Each drop can only make the remaining switches less redundant.
+        if state.can_drop(sid):
+            state.remove(sid)
+            dropped += 1
+    return dropped
+
+
+def _two_for_one(state: CoverState, moves: Tuple[np.ndarray, np.ndarray]) -> bool:
+    """Make one of the 1-for-1 ``moves`` if it leaves another selected switch redundant.
+
+    Each trial only updates the counts of flows on ``out_sid`` and ``in_sid``
+    and of the switches sharing them, and is undone the same way.
+    """
+    for out_sid, in_sid in zip(*(ids.tolist() for ids in moves)):
+        state.remove(out_sid)
+        state.add(in_sid)
+        if _drop_redundant(state):
+            return True
+        state.remove(in_sid)
+        state.add(out_sid)
+    return False
+
+
+def local_search(
+    dataset: FlowDataset,
+    selected: List[int],
+    max_iterations: int = 1000,
+    time_limit: float | None = None,
+    tabu: int = 5,
+    seed: int = 0,
+    on_improve: Callable[[List[int]], None] | None = None,
+    reduce: bool = True,
+) -> Tuple[List[int], Dict[str, int]]:
+    """Shrink a cover with drops, 2-for-1 and (as plateau moves) 1-for-1 swaps.
+
+    An incomplete ``selected`` is first repaired greedily. Each iteration drops
+    redundant switches, then tries a 2-for-1 swap; when neither applies it makes
+    a random 1-for-1 swap, keeping recently removed switches out for ``tabu``
+    iterations. Stops after ``max_iterations`` or ``time_limit`` seconds and
+    returns the smallest cover seen; ``on_improve`` is called with each new best.
+    Pass ``reduce=False`` when ``dataset`` already is a reduced instance.
+    """
+    start = time.perf_counter()
+    kernel = CoverageKernel(reduce_flows(dataset).dataset) if reduce else CoverageKernel.of(dataset)
+    state = CoverState(kernel, repair_cover(kernel, selected))
+    stats = {"initial": len(set(selected)), "iterations": 0, "drops": 0, "swaps_2_for_1": 0, "swaps_1_for_1": 0}
+    stats["drops"] = _drop_redundant(state)
+    best = state.selection()
+    if on_improve is not None and len(best) < stats["initial"]:
+        on_improve(best)
+
+    rng = np.random.default_rng(seed)
+    recent: deque = deque(maxlen=tabu)
+    for it in range(1, max_iterations + 1):
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            break
+        stats["iterations"] = it
+
+        dropped = _drop_redundant(state)
+        moves = None if dropped else state.swaps()
+        if dropped:
+            stats["drops"] += dropped
+        elif _two_for_one(state, moves):
+            stats["swaps_2_for_1"] += 1
+        else:
+            allowed = np.flatnonzero(~np.isin(moves[1], list(recent)))
+            if allowed.shape[0] == 0:
+                break
+            pick = int(allowed[rng.integers(allowed.shape[0])])
+            out_sid, in_sid = int(moves[0][pick]), int(moves[1][pick])
+            state.remove(out_sid)
+            state.add(in_sid)
+            recent.append(out_sid)
+            stats["swaps_1_for_1"] += 1
+
+        if state.size < len(best):
+            best = state.selection()
+            if on_improve is not None:
+                on_improve(best)
+    return best, stats
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Local-search post-optimization of a switch cover.")
+    parser.add_argument("--input", required=True, help="Path to flow paths JSONL (.gz ok) or columnar .npz.")
+    parser.add_argument("--solution", required=True, help="solution.json to start from (greedy, ILP or rounded).")
+    parser.add_argument("--out-dir", help="Output directory (default: out/run_<timestamp>).")
+    parser.add_argument(
+        "--cache",
+        choices=["use", "rebuild", "off"],
+        default="use",
+        help="Parsed-dataset sidecar cache (<input>.cache.npz): use, rebuild, or bypass it.",
+    )
+    parser.add_argument("--max-iterations", type=int, default=1000, help="Iteration budget.")
+    parser.add_argument("--time-limit", type=float, help="Wall-clock budget in seconds.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for plateau (1-for-1) moves.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    dataset = load_paths(Path(args.input), cache=args.cache)
+    out_dir = Path(args.out_dir) if args.out_dir else _default_out_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    run_local_search(dataset, Path(args.solution), out_dir, args.max_iterations, args.time_limit, args.seed)
+
+
+def run_local_search(
+    dataset: FlowDataset,
+    solution_path: Path,
+    out_dir: Path,
+    max_iterations: int = 1000,
+    time_limit: float | None = None,
+    seed: int = 0,
+) -> None:
+    initial_ids, initial = load_solution(dataset, solution_path)
+    selected_ids, stats = local_search(dataset, initial_ids, max_iterations, time_limit, seed=seed)
+    cover_ok, uncovered_list = evaluate_cover(dataset, selected_ids)
+
+    solution: Dict[str, Any] = {
+        "status": "LocalSearch",
+        "objective": len(selected_ids),
+        "initial_status": initial.get("status"),
+        "initial_objective": len(initial_ids),
+        "selected_switch_ids": selected_ids,
+        "selected_switch_names": [dataset.sid_to_name[sid] for sid in selected_ids],
+        "local_search": stats,
+    }
+    if initial.get("bound") is not None:
+        # A lower bound proven for the instance stays valid for any cover of it.
+        bound = float(initial["bound"])
+        solution["bound"] = bound
+        solution["gap"] = max(0.0, len(selected_ids) - bound) / max(len(selected_ids), 1e-9)
+    if not cover_ok:
+        solution["uncovered_flows"] = list(uncovered_list)
+
+    solution_out = out_dir / "solution.json"
+    with solution_out.open("w", encoding="utf-8") as fh:
+        json.dump(solution, fh, indent=2, sort_keys=True)
+
+    summary_path = out_dir / "summary.txt"
+    with summary_path.open("w", encoding="utf-8") as fh:
+        fh.write("Model: local search\n")
+        fh.write(f"Start: {solution_path} ({initial.get('status')}, {len(initial_ids)} switches)\n")
+        fh.write(f"Objective: {solution['objective']}\n")
+        fh.write(
+            f"Iterations: {stats['iterations']} | Drops: {stats['drops']} | "
+            f"2-for-1: {stats['swaps_2_for_1']} | 1-for-1: {stats['swaps_1_for_1']}\n"
+        )
+        fh.write(f"Coverage ok: {cover_ok}\n")
+
+    print(f"[done] Local search {len(initial_ids)} -> {len(selected_ids)} switches | out={out_dir}")
+
+
+def _default_out_dir() -> Path:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path("out") / f"run_{ts}"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,35 @@
 import argparse
+import heapq
 import json
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from utils.coverage import CoverageKernel
 from utils.data import FlowDataset, load_paths
 from utils.eval import evaluate_cover
+from utils.presolve import presolve, solve_components
+from utils.profiling import PhaseProfiler, add_profile_args, profiler_from_args
+from utils.reduce import aggregate_flows
+
 
+def greedy_set_cover(
+    dataset: FlowDataset, weights: np.ndarray | None = None, engine: str = "lazy"
+) -> Tuple[List[int], Set[int]]:
+    """Standard greedy set cover: pick switch covering most uncovered flows.
 
-def greedy_set_cover(dataset: FlowDataset) -> Tuple[List[int], Set[int]]:
-    """Standard greedy set cover: pick switch covering most uncovered flows."""
-    switch_to_flows: List[Set[int]] = [set() for _ in range(dataset.n_switches)]
-    for f_idx, switches in enumerate(dataset.P):
-        for sid in switches:
-            switch_to_flows[sid].add(f_idx)
+    Ties go to the lowest switch id. ``weights`` counts each row as that many
+    flows (see ``aggregate_flows``). ``engine="lazy"`` gives the same selection
+    as the reference ``"scan"`` loop in near-linear time.
+    """
+    if engine == "lazy":
+        return lazy_greedy_set_cover(dataset, weights)
+    if engine != "scan":
+        raise ValueError(f"Unknown greedy engine: {engine}")
+
+    switch_to_flows: List[Set[int]] = [set(dataset.flows_of(sid).tolist()) for sid in range(dataset.n_switches)]
 
     uncovered: Set[int] = set(range(dataset.n_flows))
     selected: List[int] = []
@@ -21,7 +38,10 @@ def greedy_set_cover(dataset: FlowDataset) -> Tuple[List[int], Set[int]]:
         best_sid = None
         best_gain = 0
         for sid, flows in enumerate(switch_to_flows):
-            gain = len(uncovered.intersection(flows))
+            if weights is None:
+                gain = len(uncovered.intersection(flows))
+            else:
+                gain = int(sum(weights[f] for f in uncovered.intersection(flows)))
             if gain > best_gain:
                 best_gain = gain
                 best_sid = sid
@@ -33,35 +53,116 @@ def greedy_set_cover(dataset: FlowDataset) -> Tuple[List[int], Set[int]]:
     return selected, uncovered
 
 
+def lazy_greedy_set_cover(dataset: FlowDataset, weights: np.ndarray | None = None) -> Tuple[List[int], Set[int]]:
+    """CELF-style greedy over a max-heap of possibly stale gains.
+
+    Exact gains are kept current incrementally: covering a flow subtracts its
+    weight from every switch on its path, so the total update work is linear in
+    the path entries. Heap entries whose key no longer matches are re-pushed.
+    """
+    kernel = CoverageKernel(dataset, weights)
+    uncovered = np.ones(dataset.n_flows, dtype=bool)
+    gains = kernel.gains(uncovered)
+
+    heap = [(-int(gain), sid) for sid, gain in enumerate(gains.tolist()) if gain > 0]
+    heapq.heapify(heap)
+    selected: List[int] = []
+    while heap:
+        neg_gain, sid = heapq.heappop(heap)
+        gain = int(gains[sid])
+        if gain <= 0:
+            continue
+        if gain != -neg_gain:
+            heapq.heappush(heap, (-gain, sid))
+            continue
+
+        selected.append(sid)
+        gains -= kernel.gains_of(kernel.cover(sid, uncovered))
+
+    return selected, set(np.flatnonzero(uncovered).tolist())
+
+
 def assign_flows(dataset: FlowDataset, selected: List[int]) -> Dict[int, int]:
     """Assign each flow to the first selected switch on its path."""
-    selected_set = set(selected)
-    assignments: Dict[int, int] = {}
-    for f_idx, switches in enumerate(dataset.P):
-        for sid in switches:
-            if sid in selected_set:
-                assignments[f_idx] = sid
-                break
-    return assignments
+    first = CoverageKernel.of(dataset).first_selected(selected)
+    assigned = np.flatnonzero(first >= 0)
+    return dict(zip(assigned.tolist(), first[assigned].tolist()))
 
-def parse_args() -> argparse.Namespace:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Greedy set cover for flow paths.")
-    parser.add_argument("--input", required=True, help="Path to flow paths JSONL (.gz ok).")
+    parser.add_argument("--input", required=True, help="Path to flow paths JSONL (.gz ok) or columnar .npz.")
     parser.add_argument("--out-dir", help="Output directory (default: out/run_<timestamp>).")
-    return parser.parse_args()
+    parser.add_argument(
+        "--cache",
+        choices=["use", "rebuild", "off"],
+        default="use",
+        help="Parsed-dataset sidecar cache (<input>.cache.npz): use, rebuild, or bypass it.",
+    )
+    parser.add_argument("--cache-hash", action="store_true", help="Also key the cache on the input's SHA-256.")
+    parser.add_argument("--engine", choices=["lazy", "scan"], default="lazy", help="Greedy implementation.")
+    parser.add_argument(
+        "--reduce",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Run greedy over distinct paths weighted by flow count (same selection, fewer rows).",
+    )
+    parser.add_argument(
+        "--presolve",
+        action="store_true",
+        help="Force single-switch flows, drop dominated switches and run greedy per independent component.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes for component runs (with --presolve).")
+    add_profile_args(parser)
+    return parser
+
+
+def parse_args() -> argparse.Namespace:
+    return build_parser().parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    dataset = load_paths(Path(args.input))
+    profiler = profiler_from_args(args)
+    with profiler.phase("load"):
+        dataset = load_paths(Path(args.input), cache=args.cache, cache_hash=args.cache_hash)
     out_dir = Path(args.out_dir) if args.out_dir else _default_out_dir()
     out_dir.mkdir(parents=True, exist_ok=True)
-    run_greedy(dataset, out_dir)
-
-
-def run_greedy(dataset: FlowDataset, out_dir: Path) -> None:
-    selected_ids, uncovered = greedy_set_cover(dataset)
-    cover_ok, uncovered_list = evaluate_cover(dataset, selected_ids)
+    run_greedy(
+        dataset,
+        out_dir,
+        reduce=args.reduce,
+        engine=args.engine,
+        presolve_components=args.presolve,
+        workers=args.workers,
+        profiler=profiler,
+    )
+
+
+def run_greedy(
+    dataset: FlowDataset,
+    out_dir: Path,
+    reduce: bool = False,
+    engine: str = "lazy",
+    presolve_components: bool = False,
+    workers: int = 1,
+    profiler: PhaseProfiler | None = None,
+) -> None:
+    profiler = profiler or PhaseProfiler()
+    if presolve_components:
+        with profiler.phase("presolve"):
+            presolved = presolve(dataset)
+        with profiler.phase("solve"):
+            selected_ids, _ = solve_components(presolved, "greedy", workers=workers)
+    elif reduce:
+        with profiler.phase("reduce"):
+            reduction = aggregate_flows(dataset)
+        with profiler.phase("solve"):
+            selected_ids, _ = greedy_set_cover(reduction.dataset, weights=reduction.counts, engine=engine)
+    else:
+        with profiler.phase("solve"):
+            selected_ids, _ = greedy_set_cover(dataset, engine=engine)
+    with profiler.phase("eval"):
+        cover_ok, uncovered_list = evaluate_cover(dataset, selected_ids)
 
     solution = {
         "status": "Greedy",
@@ -84,6 +185,7 @@ def run_greedy(dataset: FlowDataset, out_dir: Path) -> None:
         fh.write(f"Selected switches: {len(selected_ids)}\n")
         fh.write(f"Coverage ok: {cover_ok}\n")
 
+    profiler.write(out_dir, model="greedy", engine=engine, flows=dataset.n_flows, switches=dataset.n_switches)
     print(f"[done] Greedy selected {len(selected_ids)} switches | out={out_dir}")
 
 
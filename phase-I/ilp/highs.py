@@ -0,0 +1,108 @@
+from typing import Callable, List
+
+import highspy
+import numpy as np
+
+from ilp.ilp import SolveReport, SolverOptions, relative_gap
+from utils.data import FlowDataset
+from utils.reduce import canonical_csr
+
+
+# HiGHS model statuses reported with the pulp.LpStatus names used in solution.json.
+_STATUS_NAMES = {
+    highspy.HighsModelStatus.kOptimal: "Optimal",
+    highspy.HighsModelStatus.kModelEmpty: "Optimal",
+    highspy.HighsModelStatus.kInfeasible: "Infeasible",
+    highspy.HighsModelStatus.kUnbounded: "Unbounded",
+    highspy.HighsModelStatus.kUnboundedOrInfeasible: "Undefined",
+}
+
+
+def build_set_cover_highs(dataset: FlowDataset) -> highspy.Highs:
+    """Set cover model passed to HiGHS as arrays: the dataset CSR is the row-wise constraint matrix.
+
+    Same model as ``build_set_cover_model``: binary x per switch, one
+    ``sum(x on path) >= 1`` row per flow, minimize the number of switches.
+    """
+    indptr, indices = canonical_csr(dataset)
+    n_cols = dataset.n_switches
+    n_rows = dataset.n_flows
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = n_cols
+    lp.num_row_ = n_rows
+    lp.col_cost_ = np.ones(n_cols, dtype=np.float64)
+    lp.col_lower_ = np.zeros(n_cols, dtype=np.float64)
+    lp.col_upper_ = np.ones(n_cols, dtype=np.float64)
+    lp.row_lower_ = np.ones(n_rows, dtype=np.float64)
+    lp.row_upper_ = np.full(n_rows, highspy.kHighsInf, dtype=np.float64)
+    lp.integrality_ = [highspy.HighsVarType.kInteger] * n_cols
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.start_ = indptr.astype(np.int32)
+    lp.a_matrix_.index_ = indices.astype(np.int32)
+    lp.a_matrix_.value_ = np.ones(indices.shape[0], dtype=np.float64)
+
+    model = highspy.Highs()
+    model.silent()
+    model.passModel(lp)
+    return model
+
+
+def solve_highs(
+    model: highspy.Highs,
+    write_lp: str | None = None,
+    options: SolverOptions | None = None,
+    warm_start: List[int] | None = None,
+    on_incumbent: Callable[[List[int], float | None], None] | None = None,
+) -> SolveReport:
+    """Solve in memory; the LP file is only written when requested.
+
+    ``warm_start`` is a switch selection handed to HiGHS as the initial incumbent.
+    ``on_incumbent(selection, bound)`` is called from the solver for every
+    improving MIP solution.
+    """
+    options = options or SolverOptions(backend="highs")
+    if write_lp:
+        model.writeModel(write_lp)
+    if options.time_limit is not None:
+        model.setOptionValue("time_limit", float(options.time_limit))
+    if options.mip_gap is not None:
+        model.setOptionValue("mip_rel_gap", float(options.mip_gap))
+    if options.threads is not None:
+        model.setOptionValue("threads", int(options.threads))
+    if options.msg:
+        model.setOptionValue("output_flag", True)
+    if warm_start is not None:
+        start = highspy.HighsSolution()
+        values = np.zeros(model.getNumCol(), dtype=np.float64)
+        values[np.asarray(warm_start, dtype=np.int64)] = 1.0
+        start.col_value = values
+        start.value_valid = True
+        model.setSolution(start)
+
+    if on_incumbent is not None:
+
+        def improving(event) -> None:
+            bound = event.data_out.mip_dual_bound
+            selection = np.flatnonzero(np.asarray(event.data_out.mip_solution) > 0.5).tolist()
+            on_incumbent(selection, float(bound) if np.isfinite(bound) else None)
+
+        model.cbMipImprovingSolution.subscribe(improving)
+    try:
+        model.run()
+    finally:
+        if on_incumbent is not None:
+            model.cbMipImprovingSolution.clear()
+    info = model.getInfo()
+    has_solution = info.primal_solution_status == 2  # kSolutionStatusFeasible
+    status = _STATUS_NAMES.get(model.getModelStatus(), "Feasible" if has_solution else "Not Solved")
+    objective = float(info.objective_function_value) if has_solution else None
+    bound = float(info.mip_dual_bound) if np.isfinite(info.mip_dual_bound) else None
+    if status == "Optimal" and bound is None:
+        bound = objective
+    return SolveReport(status=status, objective=objective, bound=bound, gap=relative_gap(objective, bound))
+
+
+def extract_highs_selection(model: highspy.Highs) -> List[int]:
+    values = np.asarray(model.getSolution().col_value)
+    return np.flatnonzero(values > 0.5).tolist()
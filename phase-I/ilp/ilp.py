@@ -1,3 +1,8 @@
+import math
+import os
+import re
+import tempfile
+from dataclasses import dataclass
 from typing import Dict, List, Tuple
 from pulp import LpVariable
 
@@ -5,6 +10,7 @@ import numpy as np
 import pulp
 
 from utils.data import FlowDataset
+from utils.reduce import FlowReduction, aggregate_flows
 
 
 def build_set_cover_model(dataset: FlowDataset) -> Tuple[pulp.LpProblem, Dict[int, LpVariable]]:
@@ -31,45 +37,201 @@ def build_assignment_model(
         sid: pulp.LpVariable(f"x_{sid}", lowBound=0, upBound=1, cat="Binary") for sid in range(dataset.n_switches)
     }
     y_vars: Dict[Tuple[int, int], LpVariable] = {}
+    # switch -> y-vars of the flows it can serve, filled while the y-vars are created.
+    y_by_switch: List[List[LpVariable]] = [[] for _ in range(dataset.n_switches)]
 
     for f_idx, switches in enumerate(dataset.P):
         flow_y = []
         for sid in switches:
             var = pulp.LpVariable(f"y_{f_idx}_{sid}", lowBound=0, upBound=1, cat="Binary")
             y_vars[(f_idx, sid)] = var
+            y_by_switch[sid].append(var)
             flow_y.append(var)
             model += var <= x_vars[sid], f"assign_implies_select_f{f_idx}_s{sid}"
         model += pulp.lpSum(flow_y) == 1, f"assign_once_f{f_idx}"
 
-    cap_array = capacities if capacities is not None else dataset.capacities
-    if cap_array is not None:
-        if len(cap_array) != dataset.n_switches:
-            raise ValueError("Capacity array length must match number of switches.")
-        for sid in range(dataset.n_switches):
-            cap_val = float(cap_array[sid])
-            if cap_val > 0:
-                model += (
-                    pulp.lpSum(y_vars[(f_idx, sid)] for f_idx, _ in _flows_covering_sid(dataset, sid, y_vars))
-                    <= cap_val * x_vars[sid],
-                    f"capacity_s{sid}",
-                )
-
+    _add_capacity_constraints(model, dataset, x_vars, y_by_switch, capacities)
     model += pulp.lpSum(x_vars.values()) + lambda_penalty * pulp.lpSum(y_vars.values())
     return model, x_vars, y_vars
 
 
-def _flows_covering_sid(dataset: FlowDataset, sid: int, y_vars: Dict[Tuple[int, int], LpVariable]):
-    for f_idx, switches in enumerate(dataset.P):
-        if sid in switches and (f_idx, sid) in y_vars:
-            yield (f_idx, switches)
+def build_aggregated_assignment_model(
+    dataset: FlowDataset,
+    lambda_penalty: float = 0.0,
+    capacities: np.ndarray | None = None,
+    reduction: FlowReduction | None = None,
+) -> Tuple[pulp.LpProblem, Dict[int, LpVariable], Dict[Tuple[int, int], LpVariable], FlowReduction]:
+    """Assignment model over distinct paths instead of individual flows.
+
+    Each distinct switch set ``r`` carrying ``c_r`` flows gets one integer
+    ``z_{r,s} in [0, c_r]`` per switch on it (how many of those flows ``s``
+    serves), so the model size depends on distinct paths, not the flow count.
+    Use ``extract_aggregated_assignments_idx`` to map back to flows. Pass
+    ``reduction`` when ``aggregate_flows(dataset)`` is already at hand.
+    """
+    reduction = reduction or aggregate_flows(dataset)
+    rows = reduction.dataset
+    model = pulp.LpProblem("switch_assignment_aggregated", pulp.LpMinimize)
+    x_vars: Dict[int, LpVariable] = {
+        sid: pulp.LpVariable(f"x_{sid}", lowBound=0, upBound=1, cat="Binary") for sid in range(dataset.n_switches)
+    }
+    z_vars: Dict[Tuple[int, int], LpVariable] = {}
+    z_by_switch: List[List[LpVariable]] = [[] for _ in range(dataset.n_switches)]
+
+    for row, (switches, count) in enumerate(zip(rows.P, reduction.counts.tolist())):
+        row_z = []
+        for sid in switches:
+            var = pulp.LpVariable(f"z_{row}_{sid}", lowBound=0, upBound=count, cat="Integer")
+            z_vars[(row, sid)] = var
+            z_by_switch[sid].append(var)
+            row_z.append(var)
+            model += var <= count * x_vars[sid], f"assign_implies_select_r{row}_s{sid}"
+        model += pulp.lpSum(row_z) == count, f"assign_all_r{row}"
+
+    _add_capacity_constraints(model, dataset, x_vars, z_by_switch, capacities)
+    model += pulp.lpSum(x_vars.values()) + lambda_penalty * pulp.lpSum(z_vars.values())
+    return model, x_vars, z_vars, reduction
+
+
+def _add_capacity_constraints(
+    model: pulp.LpProblem,
+    dataset: FlowDataset,
+    x_vars: Dict[int, LpVariable],
+    vars_by_switch: List[List[LpVariable]],
+    capacities: np.ndarray | None,
+) -> None:
+    cap_array = capacities if capacities is not None else dataset.capacities
+    if cap_array is None:
+        return
+    if len(cap_array) != dataset.n_switches:
+        raise ValueError("Capacity array length must match number of switches.")
+    for sid in range(dataset.n_switches):
+        cap_val = float(cap_array[sid])
+        if cap_val > 0:
+            model += pulp.lpSum(vars_by_switch[sid]) <= cap_val * x_vars[sid], f"capacity_s{sid}"
+
+
+@dataclass
+class SolverOptions:
+    backend: str = "cbc"
+    time_limit: float | None = None
+    mip_gap: float | None = None
+    threads: int | None = None
+    msg: bool = False
+
+
+@dataclass
+class SolveReport:
+    """Solver outcome in solution.json terms.
+
+    ``status`` uses the pulp.LpStatus names plus ``"Feasible"`` for an
+    incumbent returned on a time or gap limit; ``bound`` is the best proven
+    lower bound and ``gap`` the relative gap ``(objective - bound) / objective``.
+    """
+
+    status: str
+    objective: float | None = None
+    bound: float | None = None
+    gap: float | None = None
+    status_code: int | None = None
 
 
-def solve_model(model: pulp.LpProblem, write_lp: str | None = None) -> int:
+def relative_gap(objective: float | None, bound: float | None) -> float | None:
+    if objective is None or bound is None:
+        return None
+    return max(0.0, objective - bound) / max(abs(objective), 1e-9)
+
+
+def solve_model(
+    model: pulp.LpProblem,
+    write_lp: str | None = None,
+    options: SolverOptions | None = None,
+    warm_start: Dict[LpVariable, float] | None = None,
+) -> int:
+    return solve_with_report(model, write_lp=write_lp, options=options, warm_start=warm_start).status_code
+
+
+def solve_with_report(
+    model: pulp.LpProblem,
+    write_lp: str | None = None,
+    options: SolverOptions | None = None,
+    warm_start: Dict[LpVariable, float] | None = None,
+) -> SolveReport:
+    """Solve a PuLP model with CBC or HiGHS under the given limits.
+
+    ``warm_start`` seeds CBC with an incumbent (PuLP's HiGHS interface ignores it).
+    """
+    options = options or SolverOptions()
     if write_lp:
         model.writeLP(write_lp)
-    solver = pulp.PULP_CBC_CMD(msg=False)
-    result_status = model.solve(solver)
-    return result_status
+    if warm_start:
+        for var, value in warm_start.items():
+            var.setInitialValue(value)
+
+    # CBC's scratch files (model, warm start, solution, log) go to a private
+    # directory that is removed however the solve ends.
+    with tempfile.TemporaryDirectory(prefix="pulp_") as scratch:
+        log_path = None
+        if options.backend == "cbc":
+            log_path = os.path.join(scratch, "cbc.log")
+            solver = pulp.PULP_CBC_CMD(
+                msg=options.msg,
+                timeLimit=options.time_limit,
+                gapRel=options.mip_gap,
+                threads=options.threads,
+                warmStart=bool(warm_start),
+                logPath=log_path,
+            )
+            solver.tmpDir = scratch
+        elif options.backend == "highs":
+            solver = pulp.HiGHS(
+                msg=options.msg, timeLimit=options.time_limit, gapRel=options.mip_gap, threads=options.threads
+            )
+        else:
+            raise ValueError(f"Unknown solver backend: {options.backend}")
+
+        result_status = model.solve(solver)
+        bound = _cbc_log_bound(log_path) if log_path else _highs_bound(model)
+        if bound is not None and _integral_objective(model):
+            bound = integral_bound(bound)
+
+    has_solution = model.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+    objective = float(pulp.value(model.objective) or 0.0) if has_solution else None
+    if result_status == pulp.LpStatusOptimal and model.sol_status == pulp.LpSolutionIntegerFeasible:
+        status = "Feasible"
+    else:
+        status = pulp.LpStatus[result_status]
+    if status == "Optimal" and bound is None:
+        bound = objective
+    return SolveReport(
+        status=status, objective=objective, bound=bound, gap=relative_gap(objective, bound), status_code=result_status
+    )
+
+
+def integral_bound(value: float | None) -> float | None:
+    """Round a lower bound on an integer-valued objective up, allowing for solver tolerance."""
+    return None if value is None else float(math.ceil(value - 1e-6))
+
+
+def _integral_objective(model: pulp.LpProblem) -> bool:
+    objective = model.objective
+    if objective is None or float(objective.constant) != int(objective.constant):
+        return False
+    return all(var.cat == pulp.LpInteger and float(coef) == int(coef) for var, coef in objective.items())
+
+
+def _cbc_log_bound(log_path: str) -> float | None:
+    with open(log_path, "r", encoding="utf-8", errors="replace") as fh:
+        match = re.search(r"Lower bound:\s*([-+0-9.eE]+)", fh.read())
+    return float(match.group(1)) if match else None
+
+
+def _highs_bound(model: pulp.LpProblem) -> float | None:
+    solver_model = getattr(model, "solverModel", None)
+    if solver_model is None:
+        return None
+    bound = float(solver_model.getInfo().mip_dual_bound)
+    return bound if np.isfinite(bound) else None
 
 
 def extract_switch_selection(x_vars: Dict[int, LpVariable], sid_to_name: List[str]) -> List[str]:
@@ -96,3 +258,21 @@ def extract_assignments_idx(y_vars: Dict[Tuple[int, int], LpVariable]) -> Dict[i
         if pulp.value(var) and pulp.value(var) > 0.5:
             assignments[f_idx] = sid
     return assignments
+
+
+def extract_aggregated_assignments_idx(
+    z_vars: Dict[Tuple[int, int], LpVariable], reduction: FlowReduction
+) -> Dict[int, int]:
+    """Hand out each row's flows, in flow order, to switches by their ``z`` counts."""
+    row_flows: List[List[int]] = [[] for _ in range(reduction.n_rows)]
+    for f_idx, row in enumerate(reduction.flow_to_row.tolist()):
+        row_flows[row].append(f_idx)
+
+    assignments: Dict[int, int] = {}
+    taken = [0] * reduction.n_rows
+    for (row, sid), var in z_vars.items():
+        count = int(round(pulp.value(var) or 0))
+        for f_idx in row_flows[row][taken[row] : taken[row] + count]:
+            assignments[f_idx] = sid
+        taken[row] += count
+    return assignments
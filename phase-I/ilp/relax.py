@@ -0,0 +1,143 @@
+import math
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import highspy
+import numpy as np
+import pulp
+
+from ilp.highs import build_set_cover_highs, solve_highs
+from ilp.ilp import SolverOptions, build_set_cover_model, integral_bound, solve_with_report
+from utils.coverage import CoverageKernel, prune_cover, repair_cover
+from utils.data import FlowDataset
+
+
+@dataclass
+class RelaxationResult:
+    """A cover found from a relaxation plus a certified lower bound on the optimum.
+
+    ``relaxation_value`` is the LP optimum or the best Lagrangian dual value;
+    ``bound`` rounds it up, since every cover has an integral size.
+    """
+
+    selected: List[int]
+    bound: float | None
+    relaxation_value: float | None
+    iterations: int = 0
+
+
+def solve_lp_relaxation(dataset: FlowDataset, options: SolverOptions | None = None) -> Tuple[np.ndarray, float | None]:
+    """Fractional switch values and LP optimum of the set cover model (``None`` if not solved to optimality)."""
+    options = options or SolverOptions()
+    if options.backend == "highs":
+        model = build_set_cover_highs(dataset)
+        n_cols = dataset.n_switches
+        model.changeColsIntegrality(
+            n_cols, np.arange(n_cols, dtype=np.int32), np.full(n_cols, highspy.HighsVarType.kContinuous)
+        )
+        report = solve_highs(model, options=options)
+        values = np.asarray(model.getSolution().col_value, dtype=np.float64)
+    else:
+        model, x_vars = build_set_cover_model(dataset)
+        for var in x_vars.values():
+            var.cat = pulp.LpContinuous
+        report = solve_with_report(model, options=options)
+        values = np.array([pulp.value(x_vars[sid]) or 0.0 for sid in range(dataset.n_switches)], dtype=np.float64)
+    if report.status != "Optimal":
+        return values, None
+    return values, report.objective
+
+
+def lp_rounding_cover(
+    dataset: FlowDataset,
+    options: SolverOptions | None = None,
+    rounding: str = "threshold",
+    samples: int = 32,
+    seed: int = 0,
+) -> RelaxationResult:
+    """Round the LP relaxation to a cover, then repair and prune it.
+
+    ``"threshold"`` keeps every switch with ``x >= 1/f`` (``f`` the longest
+    path), which is already a cover; ``"randomized"`` keeps each switch with
+    probability ``x`` over ``samples`` draws and returns the smallest repaired cover.
+    """
+    values, lp_value = solve_lp_relaxation(dataset, options)
+    kernel = CoverageKernel.of(dataset)
+    if rounding == "threshold":
+        max_len = int(kernel.lengths.max(initial=1))
+        candidates = [np.flatnonzero(values >= 1.0 / max_len - 1e-9).tolist()]
+    elif rounding == "randomized":
+        rng = np.random.default_rng(seed)
+        candidates = [np.flatnonzero(rng.random(values.shape[0]) < values).tolist() for _ in range(samples)]
+    else:
+        raise ValueError(f"Unknown rounding: {rounding}")
+
+    best: List[int] | None = None
+    for picked in candidates:
+        cover = prune_cover(kernel, repair_cover(kernel, picked), priority=values)
+        if best is None or len(cover) < len(best):
+            best = cover
+    return RelaxationResult(selected=best or [], bound=integral_bound(lp_value), relaxation_value=lp_value)
+
+
+def lagrangian_cover(
+    dataset: FlowDataset,
+    iterations: int = 1000,
+    step: float = 2.0,
+    patience: int = 30,
+    heuristic_every: int = 10,
+) -> RelaxationResult:
+    """Subgradient optimisation of the Lagrangian relaxation of the cover rows.
+
+    With multipliers ``u`` per flow, switch reduced costs are
+    ``1 - sum(u over its flows)`` and ``L(u) = sum(u) + sum(min(0, reduced))``
+    is a lower bound. Every few iterations the relaxed solution is repaired and
+    pruned into a cover; the step size halves after ``patience`` iterations
+    without a better bound, and the loop stops once the bound meets the best cover.
+    """
+    kernel = CoverageKernel.of(dataset)
+    n_flows = dataset.n_flows
+    if n_flows == 0:
+        return RelaxationResult(selected=[], bound=0.0, relaxation_value=0.0)
+
+    entry_flows = kernel.entry_flows
+    switch_degree = np.bincount(kernel.indices, minlength=kernel.n_switches)
+    # Beasley's start: each flow gets the cheapest per-flow share of a switch on its path.
+    share = 1.0 / np.maximum(switch_degree, 1)
+    u = np.minimum.reduceat(share[kernel.indices], kernel.starts)
+
+    best_cover = prune_cover(kernel, repair_cover(kernel, []))
+    best_value = -np.inf
+    lam = step
+    stale = 0
+    it = 0
+    for it in range(1, iterations + 1):
+        reduced = 1.0 - np.bincount(kernel.indices, weights=u[entry_flows], minlength=kernel.n_switches)
+        relaxed = np.flatnonzero(reduced < 0)
+        value = float(u.sum() + reduced[relaxed].sum())
+        if value > best_value + 1e-9:
+            best_value = value
+            stale = 0
+        else:
+            stale += 1
+            if stale >= patience:
+                lam /= 2.0
+                stale = 0
+
+        if it % heuristic_every == 1 or heuristic_every == 1:
+            cover = prune_cover(kernel, repair_cover(kernel, relaxed.tolist()), priority=-reduced)
+            if len(cover) < len(best_cover):
+                best_cover = cover
+        if math.ceil(best_value - 1e-6) >= len(best_cover) or lam < 1e-4:
+            break
+
+        subgradient = 1.0 - kernel.coverage_counts(relaxed.tolist())
+        norm = float(np.dot(subgradient, subgradient))
+        if norm == 0:
+            break  # the relaxed solution covers every flow exactly once: it is optimal
+        t = lam * (1.05 * len(best_cover) - value) / norm
+        u = np.maximum(0.0, u + t * subgradient)
+
+    return RelaxationResult(
+        selected=best_cover, bound=integral_bound(best_value), relaxation_value=best_value, iterations=it
+    )
@@ -1,70 +1,277 @@
 import argparse
 import json
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import numpy as np
 import pulp
 
-from ilp.ilp import build_set_cover_model, extract_switch_selection, solve_model
+from greedy.main import greedy_set_cover
+from ilp.highs import build_set_cover_highs, extract_highs_selection, solve_highs
+from ilp.relax import lagrangian_cover, lp_rounding_cover
+from ilp.ilp import (
+    build_aggregated_assignment_model,
+    build_assignment_model,
+    build_set_cover_model,
+    extract_aggregated_assignments_idx,
+    extract_assignments_idx,
+    SolveReport,
+    SolverOptions,
+    extract_switch_selection,
+    relative_gap,
+    solve_with_report,
+)
+from utils.coverage import CoverageKernel
 from utils.data import FlowDataset, load_paths
-from utils.eval import evaluate_cover
+from utils.eval import evaluate_assignment, evaluate_cover, load_solution, solution_assignments
+from utils.presolve import presolve, solve_components
+from utils.profiling import PhaseProfiler, add_profile_args, profiler_from_args
+from utils.stream import stream_evaluate_cover
+from utils.reduce import aggregate_flows, reduce_flows
 
 
-def parse_args() -> argparse.Namespace:
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Flow ILP: set cover model.")
-    parser.add_argument("--input", required=True, help="Path to flow paths JSONL (.gz ok).")
+    parser.add_argument("--input", required=True, help="Path to flow paths JSONL (.gz ok) or columnar .npz.")
     parser.add_argument("--out-dir", help="Output directory (default: out/run_<timestamp>).")
+    parser.add_argument(
+        "--cache",
+        choices=["use", "rebuild", "off"],
+        default="use",
+        help="Parsed-dataset sidecar cache (<input>.cache.npz): use, rebuild, or bypass it.",
+    )
+    parser.add_argument("--cache-hash", action="store_true", help="Also key the cache on the input's SHA-256.")
     parser.add_argument("--skip-solve", action="store_true", help="Write LP but skip solving.")
+    parser.add_argument(
+        "--model",
+        choices=["cover", "assign"],
+        default="cover",
+        help="cover: set cover; assign: flow-to-switch assignment (honours --capacities).",
+    )
+    parser.add_argument("--capacities", help="JSON map of switch name -> max assigned flows (assign model).")
+    parser.add_argument("--lambda-penalty", type=float, default=0.0, help="Assignment-variable penalty (assign model).")
+    parser.add_argument(
+        "--backend",
+        choices=["cbc", "highs"],
+        default="cbc",
+        help="cbc: CBC via PuLP; highs: HiGHS (the cover model is passed to it as arrays, in memory).",
+    )
+    parser.add_argument(
+        "--write-lp",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Export model.lp next to the solution (always on with --skip-solve).",
+    )
     parser.add_argument("--mode", choices=["solve", "preprocess", "eval"], default="solve")
-    parser.add_argument("--solution", help="Path to solution.json for eval mode.")
-    return parser.parse_args()
+    parser.add_argument(
+        "--solution",
+        nargs="+",
+        help="solution.json for eval mode; several files or directories of runs give one combined report.",
+    )
+    parser.add_argument("--report", help="Write the combined eval report to this JSON file (eval mode).")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Eval mode: read the paths file in chunks instead of loading the dataset (cover check only).",
+    )
+    parser.add_argument("--chunk-size", type=int, default=65536, help="Flows per chunk with --stream.")
+    parser.add_argument(
+        "--reduce",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Deduplicate identical paths and drop dominated ones before building the model.",
+    )
+    parser.add_argument("--time-limit", type=float, help="Solver wall-clock limit in seconds.")
+    parser.add_argument("--mip-gap", type=float, help="Relative MIP gap at which the solver stops.")
+    parser.add_argument("--threads", type=int, help="Solver threads.")
+    parser.add_argument(
+        "--warm-start",
+        action="store_true",
+        help="Seed the MIP with the greedy cover as the initial incumbent.",
+    )
+    parser.add_argument(
+        "--presolve",
+        action="store_true",
+        help="Presolve the cover model and solve its independent components separately.",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Processes for component sub-solves (with --presolve).")
+    parser.add_argument(
+        "--relax",
+        choices=["lp", "lagrangian"],
+        help="Instead of the MIP, round the LP relaxation or run a subgradient Lagrangian heuristic (cover model).",
+    )
+    parser.add_argument("--rounding", choices=["threshold", "randomized"], default="threshold", help="LP rounding.")
+    parser.add_argument("--iterations", type=int, default=1000, help="Subgradient iterations (--relax lagrangian).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for randomized rounding.")
+    add_profile_args(parser)
+    return parser
+
+
+def parse_args() -> argparse.Namespace:
+    return build_parser().parse_args()
 
 
 def main() -> None:
     args = parse_args()
     input_path = Path(args.input)
+    capacity_path = Path(args.capacities) if args.capacities else None
     if args.mode == "preprocess":
-        dataset = load_paths(input_path)
+        dataset = load_paths(input_path, capacity_path, cache=args.cache, cache_hash=args.cache_hash)
         print(_summary(dataset))
         return
 
     if args.mode == "eval":
         if not args.solution:
             raise ValueError("--solution required for eval mode")
-        dataset = load_paths(input_path)
-        run_eval(dataset, Path(args.solution))
+        if args.stream:
+            run_stream_eval(input_path, [Path(p) for p in args.solution], args.chunk_size)
+            return
+        dataset = load_paths(input_path, capacity_path, cache=args.cache, cache_hash=args.cache_hash)
+        solution_paths = [Path(p) for p in args.solution]
+        if len(solution_paths) == 1 and solution_paths[0].is_file() and not args.report:
+            run_eval(dataset, solution_paths[0])
+        else:
+            run_batch_eval(dataset, solution_paths, Path(args.report) if args.report else None)
         return
 
     # Solve mode
-    dataset = load_paths(input_path)
+    profiler = profiler_from_args(args)
+    with profiler.phase("load"):
+        dataset = load_paths(input_path, capacity_path, cache=args.cache, cache_hash=args.cache_hash)
     out_dir = Path(args.out_dir) if args.out_dir else _default_out_dir()
     out_dir.mkdir(parents=True, exist_ok=True)
-    run_solve(args, dataset, out_dir)
+    run_solve(args, dataset, out_dir, profiler)
 
 
-def run_solve(args: argparse.Namespace, dataset: FlowDataset, out_dir: Path) -> None:
-    model_name = "cover"
-    model, x_vars = build_set_cover_model(dataset)
-    y_vars = None
+def run_solve(
+    args: argparse.Namespace, dataset: FlowDataset, out_dir: Path, profiler: PhaseProfiler | None = None
+) -> None:
+    profiler = profiler or PhaseProfiler()
+    model_name = args.model
+    if args.presolve and (model_name != "cover" or args.skip_solve or args.warm_start):
+        raise ValueError("--presolve supports the cover model only, without --skip-solve or --warm-start")
+    if args.relax and (model_name != "cover" or args.skip_solve or args.presolve):
+        raise ValueError("--relax supports the cover model only, without --skip-solve or --presolve")
+    assignments = None
+    penalty = None
+    with profiler.phase("reduce"):
+        if model_name == "assign":
+            # Assignment needs every flow, so only identical paths are merged (never dominated ones).
+            reduction = aggregate_flows(dataset) if args.reduce else None
+        else:
+            reduction = reduce_flows(dataset) if args.reduce else None
+    instance = reduction.dataset if reduction else dataset
 
-    lp_path = out_dir / "model.lp"
-    result_status = None
-    if args.skip_solve:
-        model.writeLP(str(lp_path))
+    lp_path = str(out_dir / "model.lp")
+    write_lp = args.write_lp or args.skip_solve
+    solved = not args.skip_solve
+    options = SolverOptions(
+        backend=args.backend, time_limit=args.time_limit, mip_gap=args.mip_gap, threads=args.threads
+    )
+    warm_ids = None
+    if args.warm_start:
+        with profiler.phase("warm_start"):
+            warm_ids = greedy_set_cover(instance)[0]
+    report = SolveReport(status="NotSolved")
+    presolved = None
+    relaxation = None
+    if args.relax:
+        with profiler.phase("solve"):
+            if args.relax == "lp":
+                relaxation = lp_rounding_cover(instance, options, rounding=args.rounding, seed=args.seed)
+            else:
+                relaxation = lagrangian_cover(instance, iterations=args.iterations)
+        selected_ids = relaxation.selected
+        objective = float(len(selected_ids))
+        report = SolveReport(
+            status="Optimal" if relaxation.bound is not None and relaxation.bound >= objective else "Feasible",
+            objective=objective,
+            bound=relaxation.bound,
+            gap=relative_gap(objective, relaxation.bound),
+        )
+    elif args.presolve:
+        with profiler.phase("presolve"):
+            presolved = presolve(instance)
+        with profiler.phase("solve"):
+            selected_ids, info = solve_components(presolved, "ilp", options, workers=args.workers)
+        report = SolveReport(
+            status=info["status"],
+            objective=info["objective"],
+            bound=info["bound"],
+            gap=relative_gap(info["objective"], info["bound"]),
+        )
+    elif args.backend == "highs" and model_name == "cover":
+        with profiler.phase("model_build"):
+            model = build_set_cover_highs(instance)
+        if write_lp:
+            with profiler.phase("lp_write"):
+                model.writeModel(lp_path)
+        if solved:
+            with profiler.phase("solve"):
+                report = solve_highs(model, options=options, warm_start=warm_ids)
+        with profiler.phase("extract"):
+            selected_ids = extract_highs_selection(model) if report.objective is not None else []
     else:
-        result_status = solve_model(model, write_lp=str(lp_path))
+        with profiler.phase("model_build"):
+            if model_name == "assign" and reduction is not None:
+                model, x_vars, z_vars, reduction = build_aggregated_assignment_model(
+                    dataset, args.lambda_penalty, reduction=reduction
+                )
+            elif model_name == "assign":
+                model, x_vars, y_vars = build_assignment_model(dataset, args.lambda_penalty)
+            else:
+                model, x_vars = build_set_cover_model(instance)
+        if write_lp:
+            with profiler.phase("lp_write"):
+                model.writeLP(lp_path)
+        if solved:
+            warm_start = None
+            if warm_ids is not None:
+                chosen = set(warm_ids)
+                warm_start = {var: 1.0 if sid in chosen else 0.0 for sid, var in x_vars.items()}
+            with profiler.phase("solve"):
+                report = solve_with_report(model, options=options, warm_start=warm_start)
+        with profiler.phase("extract"):
+            has_solution = report.objective is not None
+            selected_ids = [sid for sid, var in x_vars.items() if has_solution and (pulp.value(var) or 0) > 0.5]
+            if model_name == "assign" and has_solution:
+                if reduction is not None:
+                    assignments = extract_aggregated_assignments_idx(z_vars, reduction)
+                else:
+                    assignments = extract_assignments_idx(y_vars)
+            if model_name == "assign" and args.lambda_penalty:
+                # Every flow is assigned exactly once, so the penalty is the constant
+                # lambda * n_flows: report the switch count and keep the penalty apart.
+                penalty = args.lambda_penalty * dataset.n_flows
+                report = _without_penalty(report, penalty, selected_ids)
+
+    cover_ok = None
+    if solved:
+        with profiler.phase("eval"):
+            cover_ok = evaluate_cover(dataset, selected_ids)[0]
 
     solution: Dict[str, Any] = {
-        "status": pulp.LpStatus[result_status] if result_status is not None else "NotSolved",
-        "objective": float(pulp.value(model.objective)) if result_status == pulp.LpStatusOptimal else None,
+        "status": report.status,
+        "objective": report.objective,
+        "bound": report.bound,
+        "gap": report.gap,
     }
-
-    selected_ids = [sid for sid, var in x_vars.items() if result_status is not None and pulp.value(var) > 0.5]
+    if penalty is not None:
+        solution["assignment_penalty"] = penalty
+    if warm_ids is not None:
+        solution["warm_start_objective"] = len(warm_ids)
+    if relaxation is not None:
+        solution["relaxation"] = args.relax
+        solution["relaxation_value"] = relaxation.relaxation_value
     selected_names = [dataset.sid_to_name[sid] for sid in selected_ids]
     solution["selected_switch_names"] = selected_names
     solution["selected_switch_ids"] = selected_ids
+    if assignments is not None:
+        solution["assignments"] = {
+            dataset.fid_to_name[f_idx]: dataset.sid_to_name[sid] for f_idx, sid in sorted(assignments.items())
+        }
 
     solution_path = out_dir / "solution.json"
     with solution_path.open("w", encoding="utf-8") as fh:
@@ -74,32 +281,108 @@ def run_solve(args: argparse.Namespace, dataset: FlowDataset, out_dir: Path) ->
     with summary_path.open("w", encoding="utf-8") as fh:
         fh.write(_summary(dataset))
         fh.write("\n")
-        fh.write(f"Model: {model_name}\n")
+        fh.write(f"Model: {model_name} ({args.relax or args.backend})\n")
+        if reduction is not None:
+            fh.write(f"Constraints: {reduction.n_rows} (reduced from {reduction.n_original} flows)\n")
+        if presolved is not None:
+            fh.write(
+                f"Presolve: {len(presolved.forced)} forced, {len(presolved.dropped)} dropped, "
+                f"{len(presolved.components)} components ({presolved.n_rows} rows)\n"
+            )
         fh.write(f"Status: {solution['status']}\n")
         fh.write(f"Objective: {solution['objective']}\n")
-        if result_status is not None:
+        fh.write(f"Bound: {solution['bound']} | Gap: {solution['gap']}\n")
+        if penalty is not None:
+            fh.write(f"Assignment penalty: {penalty} (not in objective or gap)\n")
+        if solved:
             fh.write(f"Selected switches: {len(selected_names)}\n")
+            fh.write(f"Coverage ok: {cover_ok}\n")
         else:
             fh.write("Model not solved (skip-solve enabled).\n")
 
-    selected_count = len(selected_ids) if result_status is not None else 0
+    profiler.write(
+        out_dir,
+        model=model_name,
+        backend=args.relax or args.backend,
+        flows=dataset.n_flows,
+        switches=dataset.n_switches,
+        rows=instance.n_flows,
+    )
+
+    selected_count = len(selected_ids) if solved else 0
     print(f"[done] Selected {selected_count} switches | Status={solution['status']} | out={out_dir}")
 
 
 def run_eval(dataset: FlowDataset, solution_path: Path) -> None:
-    with solution_path.open("r", encoding="utf-8") as fh:
-        sol = json.load(fh)
-
-    selected_ids = sol.get("selected_switch_ids", [])
-    selected_names = sol.get("selected_switch_names", [])
-    if not selected_ids and selected_names:
-        name_to_id = {name: idx for idx, name in enumerate(dataset.sid_to_name)}
-        selected_ids = [name_to_id[n] for n in selected_names if n in name_to_id]
-
+    selected_ids, _ = load_solution(dataset, solution_path)
     ok_cover, uncovered = evaluate_cover(dataset, selected_ids)
     print(json.dumps({"cover_ok": ok_cover, "uncovered_flows": uncovered}, indent=2))
 
 
+def run_stream_eval(input_path: Path, solution_paths: List[Path], chunk_size: int) -> None:
+    results = []
+    for solution_path in solution_paths:
+        with solution_path.open("r", encoding="utf-8") as fh:
+            sol = json.load(fh)
+        if "selected_switch_names" not in sol:
+            raise ValueError(f"{solution_path} has no selected_switch_names (needed for streaming eval)")
+        result = stream_evaluate_cover(input_path, sol["selected_switch_names"], chunk_size=chunk_size)
+        results.append({"solution": str(solution_path), **result})
+    print(json.dumps(results[0] if len(results) == 1 else results, indent=2))
+
+
+def run_batch_eval(dataset: FlowDataset, solution_paths: List[Path], report_path: Path | None = None) -> None:
+    """Check many solutions against one loaded dataset and emit a single JSON report."""
+    files: List[Path] = []
+    for path in solution_paths:
+        files.extend(sorted(path.rglob("solution.json")) if path.is_dir() else [path])
+
+    kernel = CoverageKernel.of(dataset)
+    results = []
+    for path in files:
+        selected_ids, sol = load_solution(dataset, path)
+        uncovered = kernel.uncovered_flows(selected_ids)
+        entry: Dict[str, Any] = {
+            "solution": str(path),
+            "status": sol.get("status"),
+            "objective": sol.get("objective"),
+            "selected": len(selected_ids),
+            "cover_ok": uncovered.shape[0] == 0,
+            "uncovered_flows": int(uncovered.shape[0]),
+        }
+        if "assignments" in sol:
+            check = evaluate_assignment(dataset, solution_assignments(dataset, sol))
+            entry["assignment_ok"] = check["coverage_ok"]
+            entry["capacity_ok"] = check["capacity_ok"]
+            entry["assignment_errors"] = len(check["coverage_errors"])
+            entry["capacity_errors"] = len(check["capacity_errors"])
+        results.append(entry)
+
+    report = {
+        "dataset": _summary(dataset),
+        "solutions": results,
+        "all_ok": all(
+            r["cover_ok"] and r.get("assignment_ok", True) and r.get("capacity_ok", True) for r in results
+        ),
+    }
+    text = json.dumps(report, indent=2)
+    if report_path:
+        with report_path.open("w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+        print(f"[done] Evaluated {len(results)} solutions | report={report_path}")
+    else:
+        print(text)
+
+
+def _without_penalty(report: SolveReport, penalty: float, selected_ids: List[int]) -> SolveReport:
+    """``report`` with the constant assignment penalty taken out of objective, bound and gap."""
+    if report.objective is None:
+        return report
+    objective = float(len(selected_ids))
+    bound = None if report.bound is None else report.bound - penalty
+    return replace(report, objective=objective, bound=bound, gap=relative_gap(objective, bound))
+
+
 def _summary(dataset: FlowDataset) -> str:
     cap_info = "none"
     if dataset.capacities is not None:
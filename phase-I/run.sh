@@ -13,7 +13,7 @@ fi
 INPUT="${1:-}"
 TOKEN="${2:-}"
 if [[ -z "$INPUT" ]]; then
-  echo "Usage: $0 [cover|greedy] <paths.jsonl[.gz]> [token]" >&2
+  echo "Usage: $0 [cover|greedy] <paths.jsonl[.gz]|paths.npz> [token]" >&2
   exit 1
 fi
 
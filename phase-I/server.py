@@ -0,0 +1,439 @@
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from greedy.incremental import IncrementalCover
+from greedy.main import greedy_set_cover
+from ilp.highs import build_set_cover_highs, extract_highs_selection, solve_highs
+from ilp.ilp import SolveReport, SolverOptions
+from utils.coverage import CoverageKernel
+from utils.data import FlowDataset, flow_delta_from_records, load_flow_delta, load_paths
+from utils.eval import evaluate_assignment, solution_assignments
+from utils.reduce import FlowReduction, aggregate_flows, reduce_flows
+
+ERROR_SAMPLE = 20
+
+
+class Resident:
+    """A loaded dataset plus the state reused across requests.
+
+    The coverage kernel and the reduced rows are built on first use. The incremental cover is the
+    placement that ``/delta`` requests update: it starts from the last
+    ``/solve`` result (or greedy) and tracks the resident flows plus every delta
+    applied since, while ``/solve`` and ``/eval`` always see the loaded flows.
+    """
+
+    def __init__(self, name: str, dataset: FlowDataset, source: str) -> None:
+        self.name = name
+        self.dataset = dataset
+        self.source = source
+        self.name_to_sid = {sw_name: sid for sid, sw_name in enumerate(dataset.sid_to_name)}
+        self.lock = threading.RLock()
+        self._derived: Dict[str, Any] = {}
+        self.placement: List[int] | None = None
+        self.incremental: IncrementalCover | None = None
+
+    def _derive(self, key: str, build: Callable[[FlowDataset], Any]) -> Any:
+        with self.lock:
+            if key not in self._derived:
+                self._derived[key] = build(self.dataset)
+            return self._derived[key]
+
+    @property
+    def kernel(self) -> CoverageKernel:
+        return self._derive("kernel", CoverageKernel)
+
+    @property
+    def aggregated(self) -> FlowReduction:
+        """Distinct paths with flow counts (greedy rows)."""
+        return self._derive("aggregated", aggregate_flows)
+
+    @property
+    def reduced(self) -> FlowDataset:
+        """Distinct, non-dominated paths (ILP rows)."""
+        return self._derive("reduced", lambda dataset: reduce_flows(dataset).dataset)
+
+    def switch_ids(self, names: List[str]) -> List[int]:
+        unknown = [n for n in names if n not in self.name_to_sid]
+        if unknown:
+            raise ValueError(f"Unknown switches for {self.name}: {unknown[:ERROR_SAMPLE]}")
+        return [self.name_to_sid[n] for n in names]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "flows": self.dataset.n_flows,
+            "switches": self.dataset.n_switches,
+            "capacities": self.dataset.capacities is not None,
+            "placement": None if self.placement is None else len(self.placement),
+        }
+
+
+class PlacementService:
+    """Request handlers over the resident datasets, at most ``max_concurrent`` running at once.
+
+    Files named in requests (``/load`` inputs, ``/delta`` files) must lie under
+    ``data_root`` or be one of the files loaded at startup; without a
+    ``data_root`` only the startup files can be reloaded.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 2,
+        queue_timeout: float = 30.0,
+        max_time_limit: float | None = None,
+        verbose: bool = False,
+        data_root: Path | None = None,
+    ) -> None:
+        self.datasets: Dict[str, Resident] = {}
+        self.data_root = data_root.resolve() if data_root is not None else None
+        self.startup_files: Set[Path] = set()
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.max_time_limit = max_time_limit
+        self.verbose = verbose
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def routes(self) -> Dict[Tuple[str, str], Callable[[Dict[str, Any]], Dict[str, Any]]]:
+        return {
+            ("GET", "/health"): self.health,
+            ("POST", "/load"): self.load,
+            ("POST", "/solve"): self.solve,
+            ("POST", "/eval"): self.evaluate,
+            ("POST", "/delta"): self.delta,
+        }
+
+    def run(
+        self, handler: Callable[[Dict[str, Any]], Dict[str, Any]], body: Dict[str, Any], limited: bool = True
+    ) -> Dict[str, Any]:
+        """Run one request in a concurrency slot; the result carries its queue and compute time."""
+        received = time.perf_counter()
+        if not limited:
+            result = handler(body)
+            result["timing"] = {"queue_seconds": 0.0, "seconds": time.perf_counter() - received}
+            return result
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            raise ServiceBusy(f"All {self.max_concurrent} slots busy for {self.queue_timeout}s")
+        started = time.perf_counter()
+        with self._lock:
+            self.active += 1
+        try:
+            result = handler(body)
+        finally:
+            with self._lock:
+                self.active -= 1
+            self.slots.release()
+        finished = time.perf_counter()
+        result["timing"] = {
+            "queue_seconds": started - received,
+            "seconds": finished - started,
+            **result.get("timing", {}),
+        }
+        return result
+
+    def resident(self, body: Dict[str, Any]) -> Resident:
+        name = body.get("dataset")
+        if name not in self.datasets:
+            raise ValueError(f"Unknown dataset {name!r}; loaded: {sorted(self.datasets)}")
+        return self.datasets[name]
+
+    def add_dataset(self, name: str, input_path: Path, capacity_path: Path | None = None, cache: str = "use") -> Resident:
+        dataset = load_paths(input_path, capacity_path, cache=cache)
+        resident = Resident(name, dataset, str(input_path))
+        with self._lock:
+            self.datasets[name] = resident
+        return resident
+
+    def request_path(self, value: str) -> Path:
+        """A file path from a request, refused unless it is under ``data_root`` or a startup file."""
+        path = Path(value).resolve()
+        if path in self.startup_files or (self.data_root is not None and path.is_relative_to(self.data_root)):
+            return path
+        raise PermissionError(f"{value}: outside the daemon's data root")
+
+    def health(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "datasets": {name: r.info() for name, r in sorted(self.datasets.items())},
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+        }
+
+    def load(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """``{"name", "input", "capacities"?, "cache"?}``: load (or replace) a resident dataset."""
+        capacities = body.get("capacities")
+        resident = self.add_dataset(
+            body["name"],
+            self.request_path(body["input"]),
+            self.request_path(capacities) if capacities else None,
+            body.get("cache", "use"),
+        )
+        return {"dataset": resident.name, **resident.info()}
+
+    def solve(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """``{"dataset", "method": "greedy"|"ilp", "backend"?, "time_limit"?, "mip_gap"?, "warm_start"?}``.
+
+        ILP requests solve the reduced set cover model with HiGHS; ``time_limit``
+        is capped by the server's ``--max-time-limit``. A selection becomes the
+        start of the dataset's ``/delta`` placement; an ILP that ends without an
+        incumbent leaves the previous placement in place.
+        """
+        resident = self.resident(body)
+        method = body.get("method", "greedy")
+        if method == "greedy":
+            reduction = resident.aggregated
+            selected_ids, _ = greedy_set_cover(reduction.dataset, weights=reduction.counts)
+            report = SolveReport(status="Greedy", objective=float(len(selected_ids)))
+        elif method == "ilp":
+            # CBC runs in-process and can overrun its time limit, which would hold a slot indefinitely.
+            if body.get("backend", "highs") != "highs":
+                raise ValueError("The daemon solves ILPs with backend 'highs' only")
+            options = SolverOptions(
+                backend=body.get("backend", "highs"),
+                time_limit=self._time_limit(body.get("time_limit")),
+                mip_gap=body.get("mip_gap"),
+                threads=body.get("threads"),
+            )
+            instance = resident.reduced
+            warm_ids = greedy_set_cover(instance)[0] if body.get("warm_start") else None
+            model = build_set_cover_highs(instance)
+            report = solve_highs(model, options=options, warm_start=warm_ids)
+            selected_ids = extract_highs_selection(model) if report.objective is not None else []
+        else:
+            raise ValueError(f"Unknown method {method!r}; expected greedy or ilp")
+
+        if report.objective is not None:
+            with resident.lock:
+                resident.placement = list(selected_ids)
+                resident.incremental = None
+        return {
+            "dataset": resident.name,
+            "method": method,
+            "status": report.status,
+            "objective": report.objective,
+            "bound": report.bound,
+            "gap": report.gap,
+            "selected_switch_ids": selected_ids,
+            "selected_switch_names": [resident.dataset.sid_to_name[sid] for sid in selected_ids],
+        }
+
+    def evaluate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """``{"dataset", "selected"?: [switch names], "assignments"?: {flow: switch}}``.
+
+        ``selected`` is checked like ``evaluate_cover`` and ``assignments`` like
+        ``evaluate_assignment`` (against the dataset's capacities); error lists
+        are truncated to a sample with full counts alongside.
+        """
+        resident = self.resident(body)
+        if "selected" not in body and "assignments" not in body:
+            raise ValueError("eval needs 'selected' and/or 'assignments'")
+        result: Dict[str, Any] = {"dataset": resident.name}
+        if "selected" in body:
+            uncovered = resident.kernel.uncovered_flows(resident.switch_ids(body["selected"]))
+            result["cover_ok"] = uncovered.shape[0] == 0
+            result["uncovered_flows"] = int(uncovered.shape[0])
+            result["uncovered_sample"] = [resident.dataset.fid_to_name[f] for f in uncovered[:ERROR_SAMPLE].tolist()]
+        if "assignments" in body:
+            assignments = solution_assignments(resident.dataset, {"assignments": body["assignments"]})
+            check = evaluate_assignment(resident.dataset, assignments)
+            result["coverage_ok"] = check["coverage_ok"]
+            result["capacity_ok"] = check["capacity_ok"]
+            result["unmatched_assignments"] = len(body["assignments"]) - len(assignments)
+            result["coverage_errors"] = len(check["coverage_errors"])
+            result["capacity_errors"] = len(check["capacity_errors"])
+            result["coverage_error_sample"] = [
+                resident.dataset.fid_to_name[f] for f in check["coverage_errors"][:ERROR_SAMPLE]
+            ]
+            result["capacity_error_sample"] = [
+                {"switch": resident.dataset.sid_to_name[sid], "assigned": count, "capacity": cap}
+                for sid, count, cap in check["capacity_errors"][:ERROR_SAMPLE]
+            ]
+        return result
+
+    def delta(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """``{"dataset", "records"?: [delta records] | "delta"?: path, "selected"?, "prune"?}``.
+
+        Applies a flow delta (records as in a delta file, with ``"op"``) to the
+        dataset's placement and repairs it. ``selected`` restarts the placement
+        from those switches over the loaded flows.
+        """
+        resident = self.resident(body)
+        if "records" in body:
+            delta = flow_delta_from_records(body["records"])
+        elif "delta" in body:
+            delta = load_flow_delta(self.request_path(body["delta"]))
+        else:
+            raise ValueError("delta needs 'records' or a 'delta' file path")
+
+        with resident.lock:
+            state = resident.incremental
+            if state is None or "selected" in body:
+                if "selected" in body:
+                    start = resident.switch_ids(body["selected"])
+                elif resident.placement is not None:
+                    start = resident.placement
+                else:
+                    reduction = resident.aggregated
+                    start = greedy_set_cover(reduction.dataset, weights=reduction.counts)[0]
+                state = IncrementalCover.from_dataset(resident.dataset, start)
+                resident.incremental = state
+            stats = state.apply(delta, prune=bool(body.get("prune", False)))
+            selected_ids = sorted(state.selected)
+            n_flows = state.n_flows
+            uncovered = len(state.uncovered)
+
+        apply_seconds = stats.pop("seconds")
+        return {
+            "dataset": resident.name,
+            **stats,
+            "objective": len(selected_ids),
+            "flows": n_flows,
+            "uncovered_rows": uncovered,
+            "selected_switch_names": [state.sid_to_name[sid] for sid in selected_ids],
+            "timing": {"apply_seconds": apply_seconds},
+        }
+
+    def _time_limit(self, requested: float | None) -> float | None:
+        if self.max_time_limit is None:
+            return requested
+        return self.max_time_limit if requested is None else min(float(requested), self.max_time_limit)
+
+
+class ServiceBusy(Exception):
+    pass
+
+
+def make_handler(service: PlacementService) -> type:
+    routes = service.routes()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def _dispatch(self, method: str) -> None:
+            route = self.path.split("?")[0]
+            handler = routes.get((method, route))
+            if handler is None:
+                self._reply(404, {"error": f"No route {method} {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                if not isinstance(body, dict):
+                    raise ValueError("Request body must be a JSON object")
+                # Health checks skip the slots so the daemon stays observable under load.
+                self._reply(200, service.run(handler, body, limited=route != "/health"))
+            except ServiceBusy as exc:
+                self._reply(503, {"error": str(exc)})
+            except (KeyError, ValueError, TypeError, OSError) as exc:
+                self._reply(400, {"error": f"{type(exc).__name__}: {exc}"})
+            except Exception as exc:  # keep the daemon up; report the failure to the caller
+                self._reply(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+        def _reply(self, code: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def address_string(self) -> str:
+            # Unix-socket peers have no (host, port) address.
+            return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            if service.verbose:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Placement daemon keeping flow datasets loaded between requests.")
+    parser.add_argument(
+        "--dataset",
+        action="append",
+        default=[],
+        metavar="NAME=PATHS[,CAPACITIES]",
+        help="Dataset to load at startup (repeatable); more can be loaded with POST /load.",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind address (localhost by default).")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="Serve on this Unix socket path instead of TCP.")
+    parser.add_argument(
+        "--cache",
+        choices=["use", "rebuild", "off"],
+        default="use",
+        help="Parsed-dataset sidecar cache (<input>.cache.npz) for startup datasets.",
+    )
+    parser.add_argument(
+        "--data-root",
+        help="Directory that /load and /delta file paths must lie under (default: only reload startup datasets).",
+    )
+    parser.add_argument("--max-concurrent", type=int, default=2, help="Requests computed at once; others queue.")
+    parser.add_argument(
+        "--queue-timeout", type=float, default=30.0, help="Seconds a request may wait for a slot before a 503."
+    )
+    parser.add_argument("--max-time-limit", type=float, help="Upper bound on any ILP request's time_limit.")
+    parser.add_argument("--verbose", action="store_true", help="Log every request.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    service = PlacementService(
+        args.max_concurrent,
+        args.queue_timeout,
+        args.max_time_limit,
+        args.verbose,
+        Path(args.data_root) if args.data_root else None,
+    )
+    for spec in args.dataset:
+        name, _, paths = spec.partition("=")
+        if not paths:
+            raise ValueError(f"--dataset expects NAME=PATHS[,CAPACITIES], got {spec!r}")
+        input_path, _, capacities = paths.partition(",")
+        capacity_path = Path(capacities) if capacities else None
+        service.startup_files.update(path.resolve() for path in (Path(input_path), capacity_path) if path)
+        resident = service.add_dataset(name, Path(input_path), capacity_path, args.cache)
+        print(f"[load] {name}: {resident.dataset.n_flows} flows, {resident.dataset.n_switches} switches")
+
+    handler = make_handler(service)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = UnixHTTPServer(args.socket, handler)
+        where = args.socket
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        where = f"http://{args.host}:{args.port}"
+    print(f"[serve] {where} | max_concurrent={args.max_concurrent}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import yaml
+
+import main as ilp_main
+from greedy import main as greedy_main
+from utils.data import FlowDataset, load_paths, with_capacities
+from utils.profiling import profiler_from_args
+
+ALGORITHMS = ("greedy", "cover", "assign")
+TABLE_FIELDS = ["dataset", "run", "algorithm", "status", "objective", "bound", "gap", "selected", "seconds", "out_dir"]
+
+# Datasets loaded once by the parent; forked workers inherit them without copying.
+_DATASETS: Dict[str, FlowDataset] = {}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sweep datasets x algorithms x parameters in one process pool.")
+    parser.add_argument("-c", "--config", required=True, help="YAML sweep matrix (see configs/sweep.yaml).")
+    parser.add_argument("-w", "--workers", type=int, help="Override the config's worker process count.")
+    parser.add_argument("--out-dir", help="Override the config's out_dir.")
+    return parser.parse_args()
+
+
+def expand_runs(config: Dict[str, Any]) -> List[Tuple[str, str, str, Dict[str, Any]]]:
+    """Every (dataset, run label, algorithm, params) of the matrix; list-valued params expand as a grid."""
+    runs = []
+    seen: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for dataset_name in config["datasets"]:
+        for run in config["runs"]:
+            run = dict(run)
+            algorithm = run.pop("algorithm")
+            if algorithm not in ALGORITHMS:
+                raise ValueError(f"Unknown algorithm {algorithm!r}; expected one of {ALGORITHMS}")
+            base_name = run.pop("name", algorithm)
+            grid_keys = [key for key, value in run.items() if isinstance(value, list)]
+            for combo in itertools.product(*(run[key] for key in grid_keys)):
+                params = {**run, **dict(zip(grid_keys, combo))}
+                suffix = "_".join(f"{key}={_label_value(value)}" for key, value in zip(grid_keys, combo))
+                label = f"{base_name}_{suffix}" if suffix else base_name
+                # Runs write to out_dir/<dataset>/<label>, so a repeated label would overwrite results.
+                if (dataset_name, label) in seen:
+                    raise ValueError(
+                        f"Runs {seen[dataset_name, label]} and {params} of {algorithm} share the label {label!r}; "
+                        "give them distinct names"
+                    )
+                seen[dataset_name, label] = params
+                runs.append((dataset_name, label, algorithm, params))
+    return runs
+
+
+def _label_value(value: Any) -> str:
+    """Label text of a grid value; file paths keep their directories (``caps/a/low.json`` -> ``caps_a_low``)."""
+    text = str(value)
+    if isinstance(value, str) and Path(text).suffix in (".json", ".gz", ".npz"):
+        path = Path(text)
+        text = str(path.parent / path.name.split(".")[0]).lstrip("./")
+    return text.replace("/", "_")
+
+
+def _dataset_spec(spec: Any) -> Tuple[Path, Path | None]:
+    if isinstance(spec, dict):
+        return Path(spec["paths"]), Path(spec["capacities"]) if spec.get("capacities") else None
+    return Path(spec), None
+
+
+def _load_datasets(specs: Dict[str, Any], cache: str) -> None:
+    for name, spec in specs.items():
+        if name not in _DATASETS:
+            paths, capacities = _dataset_spec(spec)
+            _DATASETS[name] = load_paths(paths, capacities, cache=cache)
+
+
+def _run_args(algorithm: str, params: Dict[str, Any], input_path: Path) -> argparse.Namespace:
+    parser = greedy_main.build_parser() if algorithm == "greedy" else ilp_main.build_parser()
+    args = parser.parse_args(["--input", str(input_path)])
+    if algorithm != "greedy":
+        args.model = algorithm
+    for key, value in params.items():
+        attr = key.replace("-", "_")
+        if not hasattr(args, attr):
+            raise ValueError(f"Unknown parameter {key!r} for {algorithm}")
+        setattr(args, attr, value)
+    return args
+
+
+def _run_one(task: Tuple[str, str, str, Dict[str, Any], str, str, bool]) -> Dict[str, Any]:
+    dataset_name, label, algorithm, params, input_path, out_dir, in_pool = task
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    args = _run_args(algorithm, params, Path(input_path))
+    if in_pool:
+        # A sweep pool worker cannot open its own pool; presolve components run serially.
+        args.workers = 1
+    dataset = _DATASETS[dataset_name]
+    if "capacities" in params:
+        dataset = with_capacities(dataset, params["capacities"])
+
+    start = time.perf_counter()
+    if algorithm == "greedy":
+        greedy_main.run_greedy(
+            dataset,
+            out_path,
+            reduce=args.reduce,
+            engine=args.engine,
+            presolve_components=args.presolve,
+            workers=args.workers,
+            profiler=profiler_from_args(args),
+        )
+    else:
+        ilp_main.run_solve(args, dataset, out_path, profiler_from_args(args))
+    seconds = time.perf_counter() - start
+
+    with (out_path / "solution.json").open("r", encoding="utf-8") as fh:
+        solution = json.load(fh)
+    return {
+        "dataset": dataset_name,
+        "run": label,
+        "algorithm": algorithm,
+        "params": params,
+        "status": solution.get("status"),
+        "objective": solution.get("objective"),
+        "bound": solution.get("bound"),
+        "gap": solution.get("gap"),
+        "selected": len(solution.get("selected_switch_ids", [])),
+        "seconds": seconds,
+        "out_dir": str(out_path),
+    }
+
+
+def run_sweep(config: Dict[str, Any], out_dir: Path, workers: int) -> List[Dict[str, Any]]:
+    specs = config["datasets"]
+    cache = config.get("cache", "use")
+    _load_datasets(specs, cache)
+
+    tasks = [
+        (name, label, algorithm, params, str(_dataset_spec(specs[name])[0]), str(out_dir / name / label), workers > 1)
+        for name, label, algorithm, params in expand_runs(config)
+    ]
+    if workers > 1:
+        # Fork shares the loaded datasets; other start methods reload them once per worker.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_load_datasets, initargs=(specs, cache)
+        ) as pool:
+            results = list(pool.map(_run_one, tasks))
+    else:
+        results = [_run_one(task) for task in tasks]
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with (out_dir / "results.json").open("w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2)
+    with (out_dir / "results.csv").open("w", encoding="utf-8", newline="") as fh:
+        writer = csv.DictWriter(fh, fieldnames=TABLE_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+    return results
+
+
+def main() -> None:
+    args = parse_args()
+    with open(args.config, "r", encoding="utf-8") as fh:
+        config = yaml.safe_load(fh)
+    out_dir = Path(args.out_dir or config.get("out_dir", "out/sweep"))
+    workers = int(args.workers if args.workers is not None else config.get("workers") or 1)
+    results = run_sweep(config, out_dir, workers)
+    print(f"[done] {len(results)} runs | table={out_dir / 'results.csv'}")
+
+
+if __name__ == "__main__":
+    main()
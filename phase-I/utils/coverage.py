@@ -0,0 +1,121 @@
+from typing import Iterable, List
+
+import numpy as np
+
+from .data import FlowDataset
+
+
+class CoverageKernel:
+    """Batched flow/switch coverage operations over a dataset's CSR incidence.
+
+    All methods work on whole arrays: per-flow masks and counts are reduced
+    segment-wise over ``indptr`` and per-switch gains are ``bincount``s over the
+    path entries, so no Python loop runs per flow.
+    """
+
+    def __init__(self, dataset: FlowDataset, weights: np.ndarray | None = None) -> None:
+        # A switch listed twice on one path must still count that flow once.
+        dataset = dataset.unique_paths()
+        self.dataset = dataset
+        self.indices = np.asarray(dataset.indices)
+        self.starts = np.asarray(dataset.indptr[:-1])
+        self.lengths = dataset.path_lengths()
+        self.entry_flows = dataset.entry_flows()
+        self.weights = (
+            np.ones(dataset.n_flows, dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        )
+
+    @classmethod
+    def of(cls, dataset: FlowDataset) -> "CoverageKernel":
+        """The unweighted kernel of ``dataset``, built on first use and cached on it."""
+        if dataset._coverage_kernel is None:
+            dataset._coverage_kernel = cls(dataset)
+        return dataset._coverage_kernel
+
+    @property
+    def n_flows(self) -> int:
+        return self.dataset.n_flows
+
+    @property
+    def n_switches(self) -> int:
+        return self.dataset.n_switches
+
+    def selection_mask(self, selected: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self.n_switches, dtype=bool)
+        mask[np.fromiter(selected, dtype=np.int64)] = True
+        return mask
+
+    def gains(self, uncovered: np.ndarray) -> np.ndarray:
+        """Weighted number of ``uncovered`` flows each switch would cover."""
+        entry_weights = np.where(uncovered[self.entry_flows], self.weights[self.entry_flows], 0)
+        return np.bincount(self.indices, weights=entry_weights, minlength=self.n_switches).astype(np.int64)
+
+    def gains_of(self, flows: np.ndarray) -> np.ndarray:
+        """Per-switch weight contributed by ``flows`` (e.g. flows just covered)."""
+        entries = self.dataset.paths_of(flows)
+        entry_weights = np.repeat(self.weights[flows], self.lengths[flows])
+        return np.bincount(entries, weights=entry_weights, minlength=self.n_switches).astype(np.int64)
+
+    def cover(self, sid: int, uncovered: np.ndarray) -> np.ndarray:
+        """Mark the flows through ``sid`` as covered in place; return the newly covered ones."""
+        flows = self.dataset.flows_of(sid)
+        newly = flows[uncovered[flows]]
+        uncovered[newly] = False
+        return newly
+
+    def coverage_counts(self, selected: Iterable[int]) -> np.ndarray:
+        """Number of selected switches on each flow's path."""
+        hits = self.selection_mask(selected)[self.indices].astype(np.int64)
+        if self.n_flows == 0:
+            return hits
+        return np.add.reduceat(hits, self.starts)
+
+    def covered_mask(self, selected: Iterable[int]) -> np.ndarray:
+        return self.coverage_counts(selected) > 0
+
+    def uncovered_flows(self, selected: Iterable[int]) -> np.ndarray:
+        return np.flatnonzero(~self.covered_mask(selected))
+
+    def uncovered_count(self, selected: Iterable[int]) -> int:
+        """Weighted count of flows the selection leaves uncovered."""
+        return int(self.weights[~self.covered_mask(selected)].sum())
+
+    def first_selected(self, selected: Iterable[int]) -> np.ndarray:
+        """First selected switch along each flow's path, or -1 when none is selected."""
+        hits = self.selection_mask(selected)[self.indices]
+        if self.n_flows == 0:
+            return np.zeros(0, dtype=np.int64)
+        sentinel = self.indices.shape[0]
+        positions = np.where(hits, np.arange(sentinel, dtype=np.int64), sentinel)
+        first = np.minimum.reduceat(positions, self.starts)
+        result = np.full(self.n_flows, -1, dtype=np.int64)
+        found = first < sentinel
+        result[found] = self.indices[first[found]]
+        return result
+
+
+def repair_cover(kernel: CoverageKernel, selected: List[int]) -> List[int]:
+    """Extend ``selected`` greedily (most uncovered flows first) until every flow is covered."""
+    selected = list(selected)
+    uncovered = ~kernel.covered_mask(selected)
+    gains = kernel.gains(uncovered)
+    while uncovered.any():
+        sid = int(np.argmax(gains))
+        if gains[sid] <= 0:
+            break
+        selected.append(sid)
+        gains -= kernel.gains_of(kernel.cover(sid, uncovered))
+    return selected
+
+
+def prune_cover(kernel: CoverageKernel, selected: List[int], priority: np.ndarray | None = None) -> List[int]:
+    """Drop redundant switches, trying those with the lowest ``priority`` first."""
+    counts = kernel.coverage_counts(selected)
+    order = sorted(selected, key=lambda sid: (priority[sid], sid)) if priority is not None else sorted(selected)
+    kept = set(selected)
+    for sid in order:
+        flows = kernel.dataset.flows_of(sid)
+        if (counts[flows] >= 2).all():
+            counts[flows] -= 1
+            kept.discard(sid)
+    return sorted(kept)
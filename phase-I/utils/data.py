@@ -1,27 +1,161 @@
 import gzip
+import hashlib
 import json
-from dataclasses import dataclass
+import os
+import struct
+import zipfile
+from array import array
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 import numpy as np
 
 
+class CSRPaths(Sequence):
+    """Read-only ``List[List[int]]`` view over CSR path arrays.
+
+    Rows are materialized on access (in blocks when iterating), so code written
+    against the old list-of-lists ``P`` keeps working without holding it in memory.
+    """
+
+    _block = 1 << 16
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray) -> None:
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __getitem__(self, f_idx):
+        if isinstance(f_idx, slice):
+            return [self[i] for i in range(*f_idx.indices(len(self)))]
+        if f_idx < 0:
+            f_idx += len(self)
+        return self.indices[self.indptr[f_idx] : self.indptr[f_idx + 1]].tolist()
+
+    def __iter__(self) -> Iterator[List[int]]:
+        n = len(self)
+        for lo in range(0, n, self._block):
+            hi = min(lo + self._block, n)
+            ptr = self.indptr[lo : hi + 1]
+            flat = self.indices[ptr[0] : ptr[-1]].tolist()
+            offsets = (ptr - ptr[0]).tolist()
+            for start, end in zip(offsets[:-1], offsets[1:]):
+                yield flat[start:end]
+
+    def __eq__(self, other) -> bool:
+        return len(self) == len(other) and all(a == list(b) for a, b in zip(self, other))
+
+
 @dataclass
 class FlowDataset:
-    P: List[List[int]]
+    """Flow paths in CSR form: flow ``f`` visits ``indices[indptr[f]:indptr[f + 1]]``."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
     sid_to_name: List[str]
     fid_to_name: List[str]
     capacities: np.ndarray | None
+    _switch_index: Tuple[np.ndarray, np.ndarray] | None = field(default=None, init=False, repr=False, compare=False)
+    # Unweighted CoverageKernel, set by CoverageKernel.of().
+    _coverage_kernel: object | None = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_lists(
+        cls,
+        P: Sequence[Sequence[int]],
+        sid_to_name: List[str],
+        fid_to_name: List[str],
+        capacities: np.ndarray | None = None,
+    ) -> "FlowDataset":
+        lengths = np.fromiter((len(path) for path in P), dtype=np.int64, count=len(P))
+        indptr = np.zeros(len(P) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter((sid for path in P for sid in path), dtype=np.int32, count=int(indptr[-1]))
+        return cls(indptr=indptr, indices=indices, sid_to_name=sid_to_name, fid_to_name=fid_to_name, capacities=capacities)
+
+    @property
+    def P(self) -> CSRPaths:
+        """Compatibility view: per-flow switch id lists."""
+        return CSRPaths(self.indptr, self.indices)
 
     @property
     def n_flows(self) -> int:
-        return len(self.P)
+        return len(self.indptr) - 1
 
     @property
     def n_switches(self) -> int:
         return len(self.sid_to_name)
 
+    def path(self, f_idx: int) -> np.ndarray:
+        return self.indices[self.indptr[f_idx] : self.indptr[f_idx + 1]]
+
+    def path_lengths(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def paths_of(self, flows: np.ndarray) -> np.ndarray:
+        """Concatenated switch ids of the given flows' paths."""
+        flows = np.asarray(flows, dtype=np.int64)
+        starts = self.indptr[flows]
+        lengths = self.indptr[flows + 1] - starts
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return self.indices[offsets + np.arange(offsets.shape[0], dtype=np.int64)]
+
+    def entry_flows(self) -> np.ndarray:
+        """Flow index of every entry in ``indices``."""
+        return np.repeat(np.arange(self.n_flows, dtype=np.int64), self.path_lengths())
+
+    def unique_paths(self) -> "FlowDataset":
+        """Dataset with repeated switches removed from each path (first visit kept, order kept).
+
+        Returns ``self`` when no path repeats a switch, which is the common case.
+        That check reads the cached switch -> flows index (a repeat shows up as
+        the same flow twice in a row under one switch), so the lexsort only
+        runs for datasets that do repeat switches.
+        """
+        s_indptr, s_flows = self.switch_index()
+        same = s_flows[1:] == s_flows[:-1]
+        same[s_indptr[1:-1][(s_indptr[1:-1] > 0) & (s_indptr[1:-1] < s_flows.shape[0])] - 1] = False
+        if not same.any():
+            return self
+        entry_flows = self.entry_flows()
+        order = np.lexsort((self.indices, entry_flows))
+        repeats = np.zeros(order.shape[0], dtype=bool)
+        repeats[1:] = (self.indices[order][1:] == self.indices[order][:-1]) & (
+            entry_flows[order][1:] == entry_flows[order][:-1]
+        )
+        if not repeats.any():
+            return self
+        keep = np.ones(order.shape[0], dtype=bool)
+        keep[order[repeats]] = False  # lexsort is stable, so the earliest visit survives
+        indptr = np.zeros(self.n_flows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_flows[keep], minlength=self.n_flows), out=indptr[1:])
+        return FlowDataset(
+            indptr=indptr,
+            indices=np.asarray(self.indices)[keep],
+            sid_to_name=self.sid_to_name,
+            fid_to_name=self.fid_to_name,
+            capacities=self.capacities,
+        )
+
+    def switch_index(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Transposed CSR (switch -> flows), built on first use and cached."""
+        if self._switch_index is None:
+            order = np.argsort(self.indices, kind="stable")
+            s_flows = self.entry_flows()[order]
+            counts = np.bincount(self.indices, minlength=self.n_switches)
+            s_indptr = np.zeros(self.n_switches + 1, dtype=np.int64)
+            np.cumsum(counts, out=s_indptr[1:])
+            self._switch_index = (s_indptr, s_flows)
+        return self._switch_index
+
+    def flows_of(self, sid: int) -> np.ndarray:
+        """Flow indices whose path contains ``sid``, in ascending order."""
+        s_indptr, s_flows = self.switch_index()
+        return s_flows[s_indptr[sid] : s_indptr[sid + 1]]
+
 
 def _open_any(path: Path):
     if str(path).endswith(".gz"):
@@ -29,45 +163,229 @@ def _open_any(path: Path):
     return path.open("r", encoding="utf-8")
 
 
-def load_paths(path: Path, capacity_path: Path | None = None) -> FlowDataset:
-    sid_to_name: List[str] = []
-    name_to_sid: Dict[str, int] = {}
-    fid_to_name: List[str] = []
-    P: List[List[int]] = []
+def load_paths(
+    path: Path,
+    capacity_path: Path | None = None,
+    cache: str = "use",
+    cache_hash: bool = False,
+) -> FlowDataset:
+    """Load a flow/path dataset; ``.npz`` files use the columnar format, anything else JSONL.
+
+    JSONL inputs are parsed once into a ``<input>.cache.npz`` sidecar keyed on the
+    input's path, size and mtime (plus its SHA-256 with ``cache_hash``); later
+    loads map the sidecar instead. ``cache`` is ``"use"``, ``"rebuild"`` or ``"off"``.
+    """
+    path = Path(path)
+    if str(path).endswith(".npz"):
+        dataset = _dataset_from_npz(mmap_npz(path))
+    elif cache == "off":
+        dataset = _parse_paths_jsonl(path)
+    elif cache in ("use", "rebuild"):
+        dataset = _load_paths_cached(path, rebuild=cache == "rebuild", with_hash=cache_hash)
+    else:
+        raise ValueError(f"Unknown cache mode: {cache}")
 
+    if capacity_path:
+        name_to_sid = {name: sid for sid, name in enumerate(dataset.sid_to_name)}
+        dataset.capacities = _load_capacities(capacity_path, name_to_sid, dataset.n_switches)
+    return dataset
+
+
+def with_capacities(dataset: FlowDataset, capacity_path: Path | None) -> FlowDataset:
+    """A view of ``dataset`` sharing its arrays but carrying the capacities from ``capacity_path``."""
+    name_to_sid = {name: sid for sid, name in enumerate(dataset.sid_to_name)}
+    capacities = _load_capacities(Path(capacity_path), name_to_sid, dataset.n_switches) if capacity_path else None
+    return replace(dataset, capacities=capacities)
+
+
+def iter_path_records(path: Path) -> Iterator[Tuple[str, Sequence[str], Dict]]:
+    """Yield ``(flow_id, path_nodes, record)`` for each record of a paths JSONL file."""
     with _open_any(path) as fh:
         for line in fh:
             line = line.strip()
             if not line:
                 continue
             record = json.loads(line)
-            flow_id_val = record.get("flow_id", record.get("id"))
-            if flow_id_val is None:
-                raise KeyError("Flow record missing 'flow_id' or 'id'")
-            flow_id = str(flow_id_val)
-
-            path_nodes: Sequence[str] = record.get("path") or record.get("nodes") or record.get("switches")
-            if path_nodes is None:
-                raise KeyError(f"Flow {flow_id} missing path/nodes")
-
-            fid_idx = len(fid_to_name)
-            fid_to_name.append(flow_id)
-
-            switch_ids: List[int] = []
-            for node in path_nodes:
-                node_name = str(node)
-                sid = name_to_sid.get(node_name)
-                if sid is None:
-                    sid = len(sid_to_name)
-                    name_to_sid[node_name] = sid
-                    sid_to_name.append(node_name)
-                switch_ids.append(sid)
-            if not switch_ids:
-                raise ValueError(f"Flow {flow_id} has empty path")
-            P.append(switch_ids)
-
-    capacities = _load_capacities(capacity_path, name_to_sid, len(sid_to_name)) if capacity_path else None
-    return FlowDataset(P=P, sid_to_name=sid_to_name, fid_to_name=fid_to_name, capacities=capacities)
+            yield (*path_record_fields(record), record)
+
+
+def path_record_fields(record: Dict) -> Tuple[str, Sequence[str]]:
+    """``(flow_id, path_nodes)`` of one paths record."""
+    flow_id_val = record.get("flow_id", record.get("id"))
+    if flow_id_val is None:
+        raise KeyError("Flow record missing 'flow_id' or 'id'")
+    flow_id = str(flow_id_val)
+
+    path_nodes: Sequence[str] = record.get("path") or record.get("nodes") or record.get("switches")
+    if path_nodes is None:
+        raise KeyError(f"Flow {flow_id} missing path/nodes")
+    return flow_id, path_nodes
+
+
+def _parse_paths_jsonl(path: Path) -> FlowDataset:
+    sid_to_name: List[str] = []
+    name_to_sid: Dict[str, int] = {}
+    fid_to_name: List[str] = []
+    indptr = array("q", [0])
+    indices = array("i")
+
+    for flow_id, path_nodes, _ in iter_path_records(path):
+        fid_to_name.append(flow_id)
+
+        for node in path_nodes:
+            node_name = str(node)
+            sid = name_to_sid.get(node_name)
+            if sid is None:
+                sid = len(sid_to_name)
+                name_to_sid[node_name] = sid
+                sid_to_name.append(node_name)
+            indices.append(sid)
+        if len(indices) == indptr[-1]:
+            raise ValueError(f"Flow {flow_id} has empty path")
+        indptr.append(len(indices))
+
+    return FlowDataset(
+        indptr=np.frombuffer(indptr, dtype=np.int64),
+        indices=np.frombuffer(indices, dtype=np.int32),
+        sid_to_name=sid_to_name,
+        fid_to_name=fid_to_name,
+        capacities=None,
+    )
+
+
+
+def cache_path_for(path: Path) -> Path:
+    return path.with_name(path.name + ".cache.npz")
+
+
+def _fingerprint(path: Path, with_hash: bool) -> str:
+    stat = path.stat()
+    key = {"path": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with path.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+        key["sha256"] = digest.hexdigest()
+    return json.dumps(key, sort_keys=True)
+
+
+def _load_paths_cached(path: Path, rebuild: bool, with_hash: bool) -> FlowDataset:
+    sidecar = cache_path_for(path)
+    fingerprint = _fingerprint(path, with_hash)
+    if not rebuild and sidecar.exists():
+        try:
+            arrays = mmap_npz(sidecar)
+            if str(arrays["fingerprint"][()]) == fingerprint:
+                return _dataset_from_npz(arrays)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass  # Stale or unreadable sidecar: fall through and rebuild it.
+
+    dataset = _parse_paths_jsonl(path)
+    try:
+        save_npz(dataset, sidecar, fingerprint=np.array(fingerprint))
+    except OSError:
+        pass  # Read-only dataset directory; caching is best effort.
+    return dataset
+
+
+def save_npz(dataset: FlowDataset, path: Path, **extra: np.ndarray) -> None:
+    """Write ``dataset`` in the columnar path layout (readable by ``load_paths``)."""
+    fids = dataset.fid_to_name
+    if all(fid.isdigit() and str(int(fid)) == fid for fid in fids):
+        flow_ids = np.array([int(fid) for fid in fids], dtype=np.int64)
+    else:
+        flow_ids = np.array(fids, dtype=str)
+    tmp_path = path.with_name(path.name + f".tmp{os.getpid()}")
+    with tmp_path.open("wb") as fh:
+        np.savez(
+            fh,
+            switch_names=np.array(dataset.sid_to_name, dtype=str),
+            indptr=np.asarray(dataset.indptr, dtype=np.int64),
+            indices=np.asarray(dataset.indices, dtype=np.int32),
+            flow_ids=flow_ids,
+            **extra,
+        )
+    os.replace(tmp_path, path)
+
+
+def mmap_npz(path: Path) -> Dict[str, np.ndarray]:
+    """Memory-map every array of an uncompressed ``.npz`` without reading it.
+
+    Compressed members fall back to a regular load. Object arrays are rejected:
+    unpickling them could run code from a crafted file, and ``save_npz`` never
+    writes them.
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as zf:
+        infos = zf.infolist()
+    with open(path, "rb") as fh:
+        for info in infos:
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(path)[name]
+                continue
+            fh.seek(info.header_offset)
+            name_len, extra_len = struct.unpack("<HH", fh.read(30)[26:30])
+            fh.seek(info.header_offset + 30 + name_len + extra_len)
+            version = np.lib.format.read_magic(fh)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(fh)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(fh)
+            if dtype.hasobject:
+                raise ValueError(f"{path}: member {name!r} holds Python objects; refusing to unpickle it")
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(
+                    path, dtype=dtype, mode="r", shape=shape, order="F" if fortran else "C", offset=fh.tell()
+                )
+    return arrays
+
+
+def _dataset_from_npz(arrays: Dict[str, np.ndarray]) -> FlowDataset:
+    sid_to_name = [str(name) for name in arrays["switch_names"].tolist()]
+    fid_to_name = [str(fid) for fid in arrays["flow_ids"].tolist()]
+    indptr = arrays["indptr"]
+    if np.any(np.diff(indptr) == 0):
+        raise ValueError("Flow with empty path in columnar dataset")
+    return FlowDataset(
+        indptr=indptr,
+        indices=arrays["indices"],
+        sid_to_name=sid_to_name,
+        fid_to_name=fid_to_name,
+        capacities=None,
+    )
+
+
+@dataclass
+class FlowDelta:
+    """Flows added to and removed from a dataset, as ``(flow_id, path_nodes)`` pairs."""
+
+    added: List[Tuple[str, List[str]]] = field(default_factory=list)
+    removed: List[Tuple[str, List[str]]] = field(default_factory=list)
+
+
+def load_flow_delta(path: Path) -> FlowDelta:
+    """Read a delta file: paths JSONL records with ``"op": "add"`` (default) or ``"remove"``.
+
+    Removed flows carry their path too, so applying a delta never needs the full flow list.
+    """
+    return flow_delta_from_records(record for _, _, record in iter_path_records(Path(path)))
+
+
+def flow_delta_from_records(records: Iterable[Dict]) -> FlowDelta:
+    """A delta from already-parsed path records (the objects of a delta file)."""
+    delta = FlowDelta()
+    for record in records:
+        flow_id, path_nodes = path_record_fields(record)
+        op = record.get("op", "add")
+        if op not in ("add", "remove"):
+            raise ValueError(f"Flow {flow_id} has unknown op {op!r}")
+        target = delta.added if op == "add" else delta.removed
+        target.append((flow_id, [str(node) for node in path_nodes]))
+    return delta
 
 
 def _load_capacities(path: Path, name_to_sid: Dict[str, int], n_switches: int) -> np.ndarray:
@@ -1,16 +1,19 @@
-from typing import Dict, Iterable, List, Tuple
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
 
 import numpy as np
 
+from .coverage import CoverageKernel
 from .data import FlowDataset
 
 
-def evaluate_cover(dataset: FlowDataset, selected_switches: Iterable[int]) -> Tuple[bool, List[int]]:
-    selected_set = set(selected_switches)
-    uncovered: List[int] = []
-    for f_idx, switches in enumerate(dataset.P):
-        if not selected_set.intersection(switches):
-            uncovered.append(f_idx)
+def evaluate_cover(
+    dataset: FlowDataset, selected_switches: Iterable[int], kernel: CoverageKernel | None = None
+) -> Tuple[bool, List[int]]:
+    """``(all flows covered, uncovered flow indices)``; reuses the dataset's cached kernel by default."""
+    kernel = kernel or CoverageKernel.of(dataset)
+    uncovered = kernel.uncovered_flows(selected_switches).tolist()
     ok = len(uncovered) == 0
     return ok, uncovered
 
@@ -19,24 +22,25 @@ def evaluate_assignment(
     dataset: FlowDataset, assignments: Dict[int, int], capacities: np.ndarray | None = None
 ) -> Dict[str, object]:
     caps = capacities if capacities is not None else dataset.capacities
-    coverage_errors: List[int] = []
-    cap_errors: List[Tuple[int, float, float]] = []
+    flows = np.fromiter(assignments.keys(), dtype=np.int64, count=len(assignments))
+    sids = np.fromiter(assignments.values(), dtype=np.int64, count=len(assignments))
+    assigned = np.full(dataset.n_flows, -1, dtype=np.int64)
+    assigned[flows] = sids
 
-    # Coverage check.
-    for f_idx, switches in enumerate(dataset.P):
-        assigned_sid = assignments.get(f_idx)
-        if assigned_sid is None or assigned_sid not in switches:
-            coverage_errors.append(f_idx)
+    # Coverage check: the assigned switch must appear somewhere on the flow's path.
+    on_path = np.asarray(dataset.indices) == assigned[dataset.entry_flows()]
+    covered = np.zeros(dataset.n_flows, dtype=bool)
+    if dataset.n_flows:
+        covered = np.logical_or.reduceat(on_path, np.asarray(dataset.indptr[:-1]))
+    coverage_errors = np.flatnonzero(~covered).tolist()
 
     # Capacity check.
+    cap_errors: List[Tuple[int, int, float]] = []
     if caps is not None:
-        counts = np.zeros(dataset.n_switches, dtype=int)
-        for sid in assignments.values():
-            counts[sid] += 1
-        for sid, count in enumerate(counts):
-            cap_val = float(caps[sid])
-            if cap_val > 0 and count > cap_val:
-                cap_errors.append((sid, count, cap_val))
+        counts = np.bincount(sids, minlength=dataset.n_switches)
+        caps = np.asarray(caps, dtype=float)
+        over = np.flatnonzero((caps > 0) & (counts > caps))
+        cap_errors = [(sid, int(counts[sid]), float(caps[sid])) for sid in over.tolist()]
 
     return {
         "coverage_ok": len(coverage_errors) == 0,
@@ -44,3 +48,26 @@ def evaluate_assignment(
         "coverage_errors": coverage_errors,
         "capacity_errors": cap_errors,
     }
+
+
+def load_solution(dataset: FlowDataset, solution_path: Path) -> Tuple[List[int], Dict[str, Any]]:
+    """Switch ids of a solution.json (falling back to its switch names) plus the raw solution."""
+    with solution_path.open("r", encoding="utf-8") as fh:
+        sol = json.load(fh)
+    selected_ids = sol.get("selected_switch_ids", [])
+    selected_names = sol.get("selected_switch_names", [])
+    if not selected_ids and selected_names:
+        name_to_id = {name: idx for idx, name in enumerate(dataset.sid_to_name)}
+        selected_ids = [name_to_id[n] for n in selected_names if n in name_to_id]
+    return selected_ids, sol
+
+
+def solution_assignments(dataset: FlowDataset, sol: Dict[str, Any]) -> Dict[int, int]:
+    """A solution's ``assignments`` (flow name -> switch name) as flow index -> switch id."""
+    fid_of = {name: idx for idx, name in enumerate(dataset.fid_to_name)}
+    sid_of = {name: idx for idx, name in enumerate(dataset.sid_to_name)}
+    return {
+        fid_of[f_name]: sid_of[s_name]
+        for f_name, s_name in sol.get("assignments", {}).items()
+        if f_name in fid_of and s_name in sid_of
+    }
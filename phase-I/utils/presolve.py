@@ -0,0 +1,203 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from .data import FlowDataset
+from .reduce import reduce_flows
+
+
+@dataclass
+class Component:
+    """One independent block of the cover instance, with switches renumbered locally."""
+
+    dataset: FlowDataset
+    switch_ids: np.ndarray  # local sid -> global sid
+
+
+@dataclass
+class PresolveResult:
+    forced: List[int] = field(default_factory=list)
+    dropped: List[int] = field(default_factory=list)
+    components: List[Component] = field(default_factory=list)
+    rounds: int = 0
+
+    @property
+    def n_rows(self) -> int:
+        return sum(comp.dataset.n_flows for comp in self.components)
+
+
+def presolve(dataset: FlowDataset) -> PresolveResult:
+    """Apply cover presolve rules to a fixpoint, then split into independent components.
+
+    Rules: a flow with a single switch forces it (and every flow through it is
+    covered); a switch whose remaining flows all pass through another switch is
+    dropped (on ties the higher id goes); duplicate and dominated flows are
+    removed. ``dataset`` may be the output of ``reduce_flows`` or raw flows.
+    """
+    result = PresolveResult()
+    rows = [set(path) for path in reduce_flows(dataset).dataset.P]
+    dropped: Set[int] = set()
+
+    changed = True
+    while changed and rows:
+        changed = False
+        result.rounds += 1
+
+        singles = {next(iter(row)) for row in rows if len(row) == 1}
+        if singles:
+            result.forced.extend(sorted(singles))
+            rows = [row for row in rows if not (row & singles)]
+            changed = True
+
+        newly_dropped = _dominated_switches(rows)
+        if newly_dropped:
+            dropped |= newly_dropped
+            rows = [row - newly_dropped for row in rows]
+            changed = True
+
+        if changed and rows:
+            rows = [set(path) for path in reduce_flows(_rows_dataset(rows, dataset)).dataset.P]
+
+    result.dropped = sorted(dropped - set(result.forced))
+    result.components = _split_components(rows, dataset)
+    return result
+
+
+def _dominated_switches(rows: List[Set[int]]) -> Set[int]:
+    switch_rows: Dict[int, List[int]] = {}
+    for r_idx, row in enumerate(rows):
+        for sid in row:
+            switch_rows.setdefault(sid, []).append(r_idx)
+
+    dropped: Set[int] = set()
+    for sid in sorted(switch_rows):
+        r_list = switch_rows[sid]
+        # Switches present on every row of `sid` cover a superset of its rows.
+        candidates = set(rows[r_list[0]])
+        for r_idx in r_list[1:]:
+            candidates &= rows[r_idx]
+        candidates -= dropped | {sid}
+        for other in sorted(candidates):
+            if len(switch_rows[other]) == len(r_list) and other > sid:
+                continue  # identical row sets: `other` is dropped when it is visited
+            dropped.add(sid)
+            break
+    return dropped
+
+
+def _rows_dataset(rows: List[Set[int]], dataset: FlowDataset) -> FlowDataset:
+    return FlowDataset.from_lists(
+        [sorted(row) for row in rows], dataset.sid_to_name, [str(i) for i in range(len(rows))]
+    )
+
+
+def _split_components(rows: List[Set[int]], dataset: FlowDataset) -> List[Component]:
+    parent = list(range(dataset.n_switches))
+
+    def find(sid: int) -> int:
+        while parent[sid] != sid:
+            parent[sid] = parent[parent[sid]]
+            sid = parent[sid]
+        return sid
+
+    for row in rows:
+        first, *rest = row
+        root = find(first)
+        for sid in rest:
+            other = find(sid)
+            if other != root:
+                parent[max(root, other)] = min(root, other)
+                root = min(root, other)
+
+    groups: Dict[int, List[Set[int]]] = {}
+    for row in rows:
+        groups.setdefault(find(next(iter(row))), []).append(row)
+
+    components: List[Component] = []
+    for root in sorted(groups):
+        comp_rows = groups[root]
+        switch_ids = np.array(sorted(set().union(*comp_rows)), dtype=np.int64)
+        local = {int(sid): idx for idx, sid in enumerate(switch_ids.tolist())}
+        comp_dataset = FlowDataset.from_lists(
+            [sorted(local[sid] for sid in row) for row in comp_rows],
+            [dataset.sid_to_name[sid] for sid in switch_ids.tolist()],
+            [str(i) for i in range(len(comp_rows))],
+        )
+        components.append(Component(dataset=comp_dataset, switch_ids=switch_ids))
+    return components
+
+
+def _solve_component(task: Tuple[np.ndarray, np.ndarray, int, str, object]) -> Tuple[List[int], Dict[str, object]]:
+    # Solvers are imported here: they import utils themselves.
+    indptr, indices, n_switches, method, options = task
+    comp = FlowDataset(
+        indptr, indices, [str(i) for i in range(n_switches)], [str(i) for i in range(len(indptr) - 1)], None
+    )
+    if method == "greedy":
+        from greedy.main import greedy_set_cover
+
+        selected, _ = greedy_set_cover(comp)
+        return selected, {"status": "Greedy", "objective": float(len(selected)), "bound": None}
+
+    if options is not None and options.backend == "highs":
+        from ilp.highs import build_set_cover_highs, extract_highs_selection, solve_highs
+
+        model = build_set_cover_highs(comp)
+        report = solve_highs(model, options=options)
+        selected = extract_highs_selection(model) if report.objective is not None else []
+    else:
+        import pulp
+
+        from ilp.ilp import build_set_cover_model, solve_with_report
+
+        model, x_vars = build_set_cover_model(comp)
+        report = solve_with_report(model, options=options)
+        has_solution = report.objective is not None
+        selected = [sid for sid, var in x_vars.items() if has_solution and (pulp.value(var) or 0) > 0.5]
+    return selected, {"status": report.status, "objective": report.objective, "bound": report.bound}
+
+
+def solve_components(
+    result: PresolveResult, method: str = "ilp", options=None, workers: int = 1
+) -> Tuple[List[int], Dict[str, object]]:
+    """Solve every component (in a process pool when ``workers > 1``) and stitch the cover.
+
+    Returns the global switch selection (forced switches first) and a summary
+    with the combined status, objective and bound.
+    """
+    tasks = [
+        (comp.dataset.indptr, comp.dataset.indices, comp.dataset.n_switches, method, options)
+        for comp in result.components
+    ]
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_solve_component, tasks))
+    else:
+        outcomes = [_solve_component(task) for task in tasks]
+
+    selected = list(result.forced)
+    statuses = []
+    objective = float(len(result.forced))
+    bound: float | None = float(len(result.forced))
+    for comp, (local_selected, info) in zip(result.components, outcomes):
+        selected.extend(comp.switch_ids[local_selected].tolist() if local_selected else [])
+        statuses.append(info["status"])
+        objective = objective + info["objective"] if info["objective"] is not None and objective is not None else None
+        bound = bound + info["bound"] if info["bound"] is not None and bound is not None else None
+
+    if method == "greedy":
+        status = "Greedy"
+    elif all(s == "Optimal" for s in statuses):
+        status = "Optimal"
+    elif objective is not None:
+        status = "Feasible"
+    else:
+        status = next((s for s in statuses if s != "Optimal"), "Not Solved")
+    return sorted(selected), {
+        "status": status,
+        "objective": objective,
+        "bound": bound,
+        "components": len(result.components),
+    }
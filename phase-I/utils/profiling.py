@@ -0,0 +1,108 @@
+import cProfile
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+
+def _max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    return rss / 2**20 if sys.platform == "darwin" else rss / 2**10
+
+
+class PhaseProfiler:
+    """Per-phase wall time and peak memory for one run, written to ``metrics.json``.
+
+    ``memory="tracemalloc"`` records each phase's peak traced allocation
+    (Python objects and NumPy buffers) at some tracing overhead; ``"rss"``
+    records the process high-water RSS at the end of each phase. When
+    ``cprofile_phase`` names a phase, that phase also runs under cProfile.
+    A disabled profiler only runs the phases.
+    """
+
+    def __init__(self, enabled: bool = False, memory: str = "tracemalloc", cprofile_phase: str | None = None) -> None:
+        if memory not in ("tracemalloc", "rss"):
+            raise ValueError(f"Unknown memory mode: {memory}")
+        self.enabled = enabled
+        self.memory = memory
+        self.cprofile_phase = cprofile_phase
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.profile: cProfile.Profile | None = None
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        tracing = self.memory == "tracemalloc"
+        if tracing:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        profile = cProfile.Profile() if name == self.cprofile_phase else None
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                self.profile = profile
+            elapsed = time.perf_counter() - start
+            if tracing:
+                peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+            else:
+                peak_mb = _max_rss_mb()
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "peak_mb": 0.0})
+            entry["seconds"] += elapsed
+            entry["peak_mb"] = max(entry["peak_mb"], peak_mb)
+
+    def write(self, out_dir: Path, **extra: Any) -> None:
+        """Write ``metrics.json`` (plus ``profile_<phase>.prof`` when a phase was profiled)."""
+        if not self.enabled:
+            return
+        metrics: Dict[str, Any] = {
+            "phases": self.phases,
+            "total_seconds": time.perf_counter() - self._start,
+            "memory": self.memory,
+            "max_rss_mb": _max_rss_mb(),
+        }
+        if self.profile is not None:
+            prof_path = out_dir / f"profile_{self.cprofile_phase}.prof"
+            self.profile.dump_stats(str(prof_path))
+            metrics["cprofile"] = prof_path.name
+        metrics.update(extra)
+        with (out_dir / "metrics.json").open("w", encoding="utf-8") as fh:
+            json.dump(metrics, fh, indent=2, sort_keys=True)
+
+
+def add_profile_args(parser) -> None:
+    """The ``--profile`` options shared by the phase-I entry points."""
+    parser.add_argument("--profile", action="store_true", help="Record per-phase wall time and memory in metrics.json.")
+    parser.add_argument(
+        "--profile-memory",
+        choices=["tracemalloc", "rss"],
+        default="tracemalloc",
+        help="Peak traced allocations per phase, or the process high-water RSS (cheaper).",
+    )
+    parser.add_argument(
+        "--cprofile",
+        nargs="?",
+        const="solve",
+        metavar="PHASE",
+        help="Also dump cProfile stats for one phase (default: solve) to profile_<phase>.prof.",
+    )
+
+
+def profiler_from_args(args) -> PhaseProfiler:
+    return PhaseProfiler(
+        enabled=args.profile or args.cprofile is not None, memory=args.profile_memory, cprofile_phase=args.cprofile
+    )
@@ -0,0 +1,199 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from .data import FlowDataset
+
+
+@dataclass
+class FlowReduction:
+    """A reduced cover instance plus the mapping back to the original flows.
+
+    ``dataset`` holds one row per kept distinct switch set (switch ids are
+    unchanged). ``flow_to_row[f]`` is the row of original flow ``f``, or -1 when
+    its switch set was dropped as dominated; ``counts[r]`` is the number of
+    original flows sharing row ``r``.
+    """
+
+    dataset: FlowDataset
+    flow_to_row: np.ndarray
+    counts: np.ndarray
+    n_original: int
+
+    @property
+    def n_rows(self) -> int:
+        return self.dataset.n_flows
+
+    def expand_rows(self, rows: Iterable[int]) -> np.ndarray:
+        """Original flow indices that map to any of ``rows``."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[np.fromiter(rows, dtype=np.int64)] = True
+        kept = self.flow_to_row >= 0
+        return np.flatnonzero(kept & mask[np.where(kept, self.flow_to_row, 0)])
+
+    def expand_assignments(self, row_assignments: Dict[int, int]) -> Dict[int, int]:
+        """Give every original flow the switch assigned to its row."""
+        assignments: Dict[int, int] = {}
+        for f_idx, row in enumerate(self.flow_to_row.tolist()):
+            sid = row_assignments.get(row) if row >= 0 else None
+            if sid is not None:
+                assignments[f_idx] = sid
+        return assignments
+
+
+def canonical_csr(dataset: FlowDataset) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR (indptr, indices) with each flow's switch ids sorted and de-duplicated."""
+    entry_flows = dataset.entry_flows()
+    order = np.lexsort((dataset.indices, entry_flows))
+    sids = np.asarray(dataset.indices)[order]
+    flows = entry_flows[order]
+    keep = np.ones(sids.shape[0], dtype=bool)
+    keep[1:] = (sids[1:] != sids[:-1]) | (flows[1:] != flows[:-1])
+    indptr = np.zeros(dataset.n_flows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(flows[keep], minlength=dataset.n_flows), out=indptr[1:])
+    return indptr, sids[keep].astype(np.int32)
+
+
+def _canonical_rows(dataset: FlowDataset) -> np.ndarray:
+    """Flows as a padded (n_flows x max_len) matrix of sorted, de-duplicated switch ids."""
+    indptr, sids = canonical_csr(dataset)
+    lengths = np.diff(indptr)
+    flows = np.repeat(np.arange(dataset.n_flows, dtype=np.int64), lengths)
+    cols = np.arange(sids.shape[0], dtype=np.int64) - indptr[flows]
+    matrix = np.full((dataset.n_flows, int(lengths.max(initial=0))), -1, dtype=np.int32)
+    matrix[flows, cols] = sids
+    return matrix
+
+
+def aggregate_flows(dataset: FlowDataset) -> FlowReduction:
+    """Collapse flows with identical switch sets into one row with a multiplicity count.
+
+    Rows keep first-appearance order and are named after their first flow.
+    """
+    if dataset.n_flows == 0:
+        return FlowReduction(dataset, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), 0)
+
+    matrix = _canonical_rows(dataset)
+    _, first, inverse, counts = np.unique(matrix, axis=0, return_index=True, return_inverse=True, return_counts=True)
+    by_appearance = np.argsort(first, kind="stable")
+    rank = np.empty_like(by_appearance)
+    rank[by_appearance] = np.arange(by_appearance.shape[0])
+
+    rows = matrix[first[by_appearance]]
+    lengths = (rows >= 0).sum(axis=1)
+    indptr = np.zeros(rows.shape[0] + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    reduced = FlowDataset(
+        indptr=indptr,
+        indices=rows[rows >= 0].astype(np.int32),
+        sid_to_name=dataset.sid_to_name,
+        fid_to_name=[dataset.fid_to_name[f] for f in first[by_appearance].tolist()],
+        capacities=dataset.capacities,
+    )
+    return FlowReduction(
+        dataset=reduced,
+        flow_to_row=rank[inverse.reshape(-1)].astype(np.int64),
+        counts=counts[by_appearance].astype(np.int64),
+        n_original=dataset.n_flows,
+    )
+
+
+def dominated_rows(dataset: FlowDataset, chunk_bytes: int = 1 << 25, deadline: float | None = None) -> np.ndarray:
+    """Boolean mask of rows whose switch set strictly contains another row's set.
+
+    Assumes rows are distinct sets (see :func:`aggregate_flows`); covering the
+    minimal rows then covers every dominated row as well.
+
+    Rows are grouped by their rarest switch ``s``: any superset of such a row
+    also contains ``s``, so it is one of the ``m`` rows in ``flows_of(s)``. For
+    each group, the subset test ANDs ``m``-bit membership bitsets of the row's
+    switches over that list, a few rows at a time so the gathered bitsets stay
+    under ``chunk_bytes``. With a ``deadline`` (a ``time.perf_counter()``
+    value) the scan stops once it passes; every row marked by then is still
+    dominated, only some dominated rows may be missed.
+    """
+    n_rows = dataset.n_flows
+    dominated = np.zeros(n_rows, dtype=bool)
+    lengths = dataset.path_lengths()
+    if n_rows == 0 or not lengths.all():
+        return dominated
+    indptr = np.asarray(dataset.indptr, dtype=np.int64)
+    indices = np.asarray(dataset.indices, dtype=np.int64)
+    list_sizes = np.bincount(indices, minlength=dataset.n_switches)
+    by_rarity = np.lexsort((list_sizes[indices], dataset.entry_flows()))
+    rarest = indices[by_rarity[indptr[:-1]]]
+
+    rows_by_rarest = np.argsort(rarest, kind="stable")
+    group_starts = np.flatnonzero(np.r_[True, rarest[rows_by_rarest][1:] != rarest[rows_by_rarest][:-1]])
+    for start, stop in zip(group_starts.tolist(), np.r_[group_starts[1:], n_rows].tolist()):
+        sid = int(rarest[rows_by_rarest[start]])
+        pool = dataset.flows_of(sid)
+        if pool.shape[0] <= 1:
+            continue
+        # Bitset per switch over the pool: bit i set iff pool row i contains it.
+        pool_switches = dataset.paths_of(pool)
+        local_ids, local = np.unique(pool_switches, return_inverse=True)
+        members = np.zeros((local_ids.shape[0], pool.shape[0]), dtype=bool)
+        members[local, np.repeat(np.arange(pool.shape[0]), lengths[pool])] = True
+        bitsets = np.packbits(members, axis=1)
+
+        group = rows_by_rarest[start:stop]
+        group_lengths = lengths[group]
+        # Pad short rows with the group's own switch, whose bitset is all ones.
+        padded = np.full((group.shape[0], int(group_lengths.max())), np.searchsorted(local_ids, sid))
+        group_rows = np.repeat(np.arange(group.shape[0]), group_lengths)
+        cols = np.arange(group_rows.shape[0]) - np.repeat(np.cumsum(group_lengths) - group_lengths, group_lengths)
+        padded[group_rows, cols] = np.searchsorted(local_ids, dataset.paths_of(group))
+        own = np.searchsorted(pool, group)
+        own_bit = (128 >> (own & 7)).astype(np.uint8)
+        supersets = np.zeros(bitsets.shape[1], dtype=np.uint8)
+        step = max(1, chunk_bytes // (padded.shape[1] * bitsets.shape[1]))
+        for lo in range(0, group.shape[0], step):
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            hits = np.bitwise_and.reduce(bitsets[padded[lo : lo + step]], axis=1)
+            # Every row contains itself; only strict supersets are dominated.
+            hits[np.arange(hits.shape[0]), own[lo : lo + step] >> 3] &= ~own_bit[lo : lo + step]
+            supersets |= np.bitwise_or.reduce(hits, axis=0)
+        dominated[pool[np.unpackbits(supersets, count=pool.shape[0]).astype(bool)]] = True
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return dominated
+
+
+def reduce_flows(dataset: FlowDataset, dominance: bool = True) -> FlowReduction:
+    """Deduplicate identical paths and (optionally) drop dominated rows for set cover."""
+    reduction = aggregate_flows(dataset)
+    return drop_dominated(reduction) if dominance else reduction
+
+
+def drop_dominated(reduction: FlowReduction, deadline: float | None = None) -> FlowReduction:
+    """``reduction`` without its dominated rows; see :func:`dominated_rows` for ``deadline``."""
+    if reduction.n_rows == 0:
+        return reduction
+
+    keep = ~dominated_rows(reduction.dataset, deadline=deadline)
+    if keep.all():
+        return reduction
+
+    agg = reduction.dataset
+    new_row = np.full(reduction.n_rows, -1, dtype=np.int64)
+    new_row[keep] = np.arange(int(keep.sum()))
+    lengths = agg.path_lengths()[keep]
+    indptr = np.zeros(lengths.shape[0] + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    kept = FlowDataset(
+        indptr=indptr,
+        indices=np.asarray(agg.indices)[np.repeat(keep, agg.path_lengths())],
+        sid_to_name=agg.sid_to_name,
+        fid_to_name=[name for name, k in zip(agg.fid_to_name, keep.tolist()) if k],
+        capacities=agg.capacities,
+    )
+    return FlowReduction(
+        dataset=kept,
+        flow_to_row=new_row[reduction.flow_to_row],
+        counts=reduction.counts[keep],
+        n_original=reduction.n_original,
+    )
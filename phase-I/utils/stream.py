@@ -0,0 +1,117 @@
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from .coverage import CoverageKernel
+from .data import FlowDataset, iter_path_records, mmap_npz
+
+
+def iter_dataset_chunks(path: Path, chunk_size: int = 65536) -> Iterator[FlowDataset]:
+    """Yield a paths file as consecutive FlowDatasets of at most ``chunk_size`` flows.
+
+    All chunks share one switch numbering (``sid_to_name`` is the same list,
+    growing as JSONL records introduce new switches). Columnar ``.npz`` files
+    are memory-mapped and sliced, so only one chunk is in memory at a time.
+    """
+    path = Path(path)
+    if str(path).endswith(".npz"):
+        arrays = mmap_npz(path)
+        sid_to_name = [str(name) for name in arrays["switch_names"].tolist()]
+        indptr, indices, flow_ids = arrays["indptr"], arrays["indices"], arrays["flow_ids"]
+        n_flows = indptr.shape[0] - 1
+        for lo in range(0, n_flows, chunk_size):
+            hi = min(lo + chunk_size, n_flows)
+            chunk_ptr = np.asarray(indptr[lo : hi + 1], dtype=np.int64)
+            yield FlowDataset(
+                indptr=chunk_ptr - chunk_ptr[0],
+                indices=np.asarray(indices[chunk_ptr[0] : chunk_ptr[-1]], dtype=np.int32),
+                sid_to_name=sid_to_name,
+                fid_to_name=[str(fid) for fid in flow_ids[lo:hi].tolist()],
+                capacities=None,
+            )
+        return
+
+    sid_to_name: List[str] = []
+    name_to_sid: Dict[str, int] = {}
+    paths: List[List[int]] = []
+    fid_to_name: List[str] = []
+    for flow_id, path_nodes, _ in iter_path_records(path):
+        sids = []
+        for node in path_nodes:
+            node_name = str(node)
+            sid = name_to_sid.get(node_name)
+            if sid is None:
+                sid = len(sid_to_name)
+                name_to_sid[node_name] = sid
+                sid_to_name.append(node_name)
+            sids.append(sid)
+        paths.append(sids)
+        fid_to_name.append(flow_id)
+        if len(paths) == chunk_size:
+            yield FlowDataset.from_lists(paths, sid_to_name, fid_to_name)
+            paths, fid_to_name = [], []
+    if paths:
+        yield FlowDataset.from_lists(paths, sid_to_name, fid_to_name)
+
+
+def stream_evaluate_cover(
+    path: Path, selected_names: Iterable[str], chunk_size: int = 65536, sample: int = 20
+) -> Dict[str, object]:
+    """Check a switch selection against a paths file chunk by chunk.
+
+    Memory is bounded by the chunk size plus per-switch counters. Reports the
+    uncovered flow count (with a sample of their ids), a histogram of how many
+    selected switches cover each flow, and per selected switch the flows
+    traversing it and the flows it would serve as the first selected switch on
+    their path.
+    """
+    wanted = set(selected_names)
+    selected = np.zeros(0, dtype=bool)
+    traversing = np.zeros(0, dtype=np.int64)
+    assigned = np.zeros(0, dtype=np.int64)
+    multiplicity = np.zeros(1, dtype=np.int64)
+    n_flows = 0
+    uncovered = 0
+    uncovered_sample: List[str] = []
+    sid_to_name: List[str] = []
+
+    for chunk in iter_dataset_chunks(path, chunk_size):
+        sid_to_name = chunk.sid_to_name
+        n_switches = len(sid_to_name)
+        if n_switches > selected.shape[0]:
+            new_names = sid_to_name[selected.shape[0] :]
+            selected = np.concatenate([selected, np.fromiter((n in wanted for n in new_names), dtype=bool)])
+            traversing = np.pad(traversing, (0, n_switches - traversing.shape[0]))
+            assigned = np.pad(assigned, (0, n_switches - assigned.shape[0]))
+
+        kernel = CoverageKernel(chunk)
+        selected_ids = np.flatnonzero(selected)
+        counts = kernel.coverage_counts(selected_ids)
+        first = kernel.first_selected(selected_ids)
+
+        n_flows += chunk.n_flows
+        missed = np.flatnonzero(counts == 0)
+        uncovered += missed.shape[0]
+        for f_idx in missed[: max(0, sample - len(uncovered_sample))].tolist():
+            uncovered_sample.append(chunk.fid_to_name[f_idx])
+        traversing += np.bincount(kernel.indices, minlength=n_switches)
+        assigned += np.bincount(first[first >= 0], minlength=n_switches)
+        hist = np.bincount(counts)
+        if hist.shape[0] > multiplicity.shape[0]:
+            multiplicity = np.pad(multiplicity, (0, hist.shape[0] - multiplicity.shape[0]))
+        multiplicity[: hist.shape[0]] += hist
+
+    known = set(sid_to_name)
+    return {
+        "flows": n_flows,
+        "cover_ok": uncovered == 0,
+        "uncovered_flows": uncovered,
+        "uncovered_sample": uncovered_sample,
+        "coverage_histogram": {str(k): int(v) for k, v in enumerate(multiplicity.tolist()) if v},
+        "switch_load": {
+            sid_to_name[sid]: {"traversing": int(traversing[sid]), "assigned": int(assigned[sid])}
+            for sid in np.flatnonzero(selected).tolist()
+        },
+        "unknown_switches": sorted(wanted - known),
+    }